@@ -0,0 +1,80 @@
+from sqlite3 import Connection as DBConnection
+from typing import Iterator, List
+
+CHANGE_COLUMNS = ["seq", "table_name", "row_id", "id_contact", "operation", "changed_at"]
+
+
+class Change:
+    """ one row of change_log, see migration_change_log """
+    __slots__ = ("seq", "table_name", "row_id", "id_contact", "operation", "changed_at")
+
+    def __init__(self, seq: int, table_name: str, row_id: int, id_contact: int, operation: str, changed_at: str):
+        self.seq = seq
+        self.table_name = table_name
+        self.row_id = row_id
+        self.id_contact = id_contact
+        self.operation = operation
+        """ insert, update, delete ( soft delete of contacts and connections is update of 'deleted' ) """
+        self.changed_at = changed_at
+
+    def __repr__(self) -> str:
+        return f"{self.seq} {self.operation} {self.table_name} {self.row_id}"
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, column) for column in CHANGE_COLUMNS)
+
+
+class ChangesPruned(Exception):
+    """ changes after the requested seq were deleted by prune_changes, consumer needs full export """
+    pass
+
+
+def last_change_seq(connection: DBConnection) -> int:
+    """ seq of the last change, starting point of a consumer after full export, 0 for empty log """
+    row = connection.execute("SELECT max(seq) FROM change_log").fetchone()
+    return row[0] or 0
+
+
+def check_not_pruned(connection: DBConnection, since_seq: int) -> None:
+    """ ChangesPruned, when changes right after since_seq are not in the log anymore """
+    first_seq = connection.execute("SELECT min(seq) FROM change_log").fetchone()[0]
+    if first_seq is not None and since_seq + 1 < first_seq:
+        raise ChangesPruned(f"changes {since_seq + 1}..{first_seq - 1} were pruned, start with full export "
+                            f"and --since-seq={first_seq - 1}")
+
+
+def iter_changes(connection: DBConnection, since_seq: int = 0, limit: int = None) -> Iterator[Change]:
+    """
+    changes with seq > since_seq in the order of seq, range of the primary key: cost depends on the amount of changes only,
+    seq of the last returned change is since_seq of the next call, ChangesPruned before the first change
+    """
+    check_not_pruned(connection, since_seq)
+    return read_changes(connection, since_seq, limit)
+
+
+def read_changes(connection: DBConnection, since_seq: int, limit: int = None) -> Iterator[Change]:
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""SELECT seq, table_name, row_id, id_contact, operation, datetime(changed_at, 'unixepoch')
+                           FROM change_log WHERE seq > ? ORDER BY seq {'LIMIT ?' if limit else ''}""",
+                       (since_seq, limit) if limit else (since_seq,))
+        for row in cursor:
+            yield Change(*row)
+    finally:
+        cursor.close()
+
+
+def get_changes(connection: DBConnection, since_seq: int = 0, limit: int = None) -> List[Change]:
+    """ list of iter_changes """
+    return list(iter_changes(connection, since_seq, limit))
+
+
+def prune_changes(connection: DBConnection, up_to_seq: int) -> int:
+    """
+    delete changes with seq <= up_to_seq ( read by all consumers ), the last change is kept: min(seq) shows the pruned range
+    :return: amount of deleted changes
+    """
+    cursor = connection.execute("DELETE FROM change_log WHERE seq <= ? AND seq < (SELECT max(seq) FROM change_log)",
+                                (up_to_seq,))
+    connection.commit()
+    return cursor.rowcount
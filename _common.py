@@ -1,13 +1,95 @@
+import builtins
+import sys
+import time
+
+
+class ImportTimer:
+    """
+    option '--startup-profile': wall time of every import statement, that loads new module,
+    heavy libraries must be imported only by the feature that needs them
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = []
+        """ ( name of the module, seconds, depth of the nested import ) """
+        self.depth = 0
+        self.reported = 0
+        self.original_import = builtins.__import__
+
+    def install(self) -> None:
+        import atexit
+        builtins.__import__ = self.timed_import
+        atexit.register(self.report, "lazy imports before exit")
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+        started = time.perf_counter()
+        self.depth += 1
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            self.depth -= 1
+            self.imports.append((name, time.perf_counter() - started, self.depth))
+
+    def report(self, title: str = "startup") -> None:
+        """ print top level imports since previous report, the slowest first """
+        imports = [(name, seconds) for name, seconds, depth in self.imports[self.reported:] if depth == 0]
+        self.reported = len(self.imports)
+        if not imports and title != "startup":
+            return
+        print(f"{title}: {(time.perf_counter() - self.started) * 1000:.1f} ms after start of _common, "
+              f"{sum(seconds for _, seconds in imports) * 1000:.1f} ms in imports:", file=sys.stderr)
+        for name, seconds in sorted(imports, key=lambda each_import: -each_import[1]):
+            print(f"  {seconds * 1000:8.1f} ms  {name}", file=sys.stderr)
+
+
+IMPORT_TIMER: ImportTimer = None
+if "--startup-profile" in sys.argv:
+    IMPORT_TIMER = ImportTimer()
+    IMPORT_TIMER.install()
+
+
+def report_startup_profile() -> None:
+    """ call it when application is ready for the user ( menu, report ) """
+    if IMPORT_TIMER is not None:
+        IMPORT_TIMER.report()
+
+
 import sqlite3
+from collections import OrderedDict
+from contextlib import contextmanager
 from sqlite3 import Connection as DBConnection, Error, Cursor
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import List, Tuple
-import sys
+from itertools import islice, starmap
+from typing import Callable, Iterable, Iterator, List, Tuple, Union
+import os
 
 DB_DEFAULT_PATH = "contacts-meetings.db"
 """ default path to database file """
 
+EPOCH = datetime(1970, 1, 1)
+""" meetings.date - integer, seconds of the local time since EPOCH ( like SQLite strftime('%s', ...) without time zone ) """
+
+
+def adapt_datetime(dt: datetime) -> int:
+    return int((dt - EPOCH).total_seconds())
+
+
+def convert_epoch(value: bytes) -> datetime:
+    """ converter of the columns selected as 'date AS "date [epoch]"' """
+    try:
+        return EPOCH + timedelta(seconds=int(value))
+    except ValueError:
+        # not migrated database ( read-only connection ) with dates as text
+        return datetime.strptime(value.decode(), '%Y-%m-%d %H:%M:%S')
+
+
+sqlite3.register_adapter(datetime, adapt_datetime)
+sqlite3.register_converter("epoch", convert_epoch)
+
 
 def create_table(conn: DBConnection, create_table_sql):
     cursor:Cursor = None
@@ -21,16 +103,932 @@ def create_table(conn: DBConnection, create_table_sql):
             cursor.close()
 
 
-def create_connection(db_file: str = DB_DEFAULT_PATH) -> DBConnection :
+SQL_CREATE_CONTACTS = """ CREATE TABLE IF NOT EXISTS contacts (
+                            id integer PRIMARY KEY AUTOINCREMENT,
+                            name text NOT NULL,
+                            surname text NOT NULL,
+                            birthdate DATE,
+                            note text, 
+                            deleted boolean DEFAULT FALSE
+                        ); """
+""" DATE - text in format 'YYYY-MM-DD' """
+
+SQL_CREATE_CONNECTIONS = """CREATE TABLE IF NOT EXISTS connections (
+                            id integer PRIMARY KEY AUTOINCREMENT,
+                            id_contact integer NOT NULL,
+                            phone_privat text,
+                            phone_work text,
+                            phone_secret text,
+                            email_privat text,
+                            email_work text,
+                            email_secret text,
+                            whatsup text,
+                            telegram text,
+                            signal text,
+                            hangouts text,
+                            deleted boolean DEFAULT FALSE, 
+                            FOREIGN KEY (id_contact) REFERENCES contacts (id)
+                        );"""
+
+SQL_CREATE_MEETINGS = """CREATE TABLE IF NOT EXISTS 
+                         meetings (
+                             id INTEGER PRIMARY KEY, 
+                             id_contact INTEGER, 
+                             date DATE, 
+                             status INTEGER, 
+                             notes TEXT,
+                             FOREIGN KEY (id_contact) REFERENCES contacts (id)
+                         )"""
+
+BIRTHDAY_KEY_SQL = """CASE WHEN {birthdate} LIKE '--__-__'
+                              THEN CAST(substr({birthdate}, 3, 2) || substr({birthdate}, 6, 2) AS INTEGER)
+                              ELSE CAST(strftime('%m%d', {birthdate}) AS INTEGER) END"""
+""" month-day key of the birthdate as integer MMDD ( Google exports birthdays without year as '--MM-DD' ) """
+
+
+def get_columns(cursor: Cursor, table: str) -> List[str]:
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+
+
+def migration_tables(cursor: Cursor) -> None:
+    """ baseline schema: contacts, connections, meetings """
+    cursor.execute(SQL_CREATE_CONTACTS)
+    cursor.execute(SQL_CREATE_CONNECTIONS)
+    cursor.execute(SQL_CREATE_MEETINGS)
+
+
+def migration_birthday_key(cursor: Cursor) -> None:
+    """ contacts.birth_md - precomputed month-day key of the birthdate, maintained by triggers """
+    if "birth_md" not in get_columns(cursor, "contacts"):
+        cursor.execute("ALTER TABLE contacts ADD COLUMN birth_md INTEGER")
+    cursor.execute("UPDATE contacts SET birth_md = " + BIRTHDAY_KEY_SQL.format(birthdate="birthdate"))
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contacts_birth_md ON contacts (birth_md)")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS contacts_birth_md_insert AFTER INSERT ON contacts
+                       BEGIN
+                           UPDATE contacts SET birth_md = {BIRTHDAY_KEY_SQL.format(birthdate="NEW.birthdate")} WHERE id = NEW.id;
+                       END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS contacts_birth_md_update AFTER UPDATE OF birthdate ON contacts
+                       BEGIN
+                           UPDATE contacts SET birth_md = {BIRTHDAY_KEY_SQL.format(birthdate="NEW.birthdate")} WHERE id = NEW.id;
+                       END""")
+
+
+def migration_indexes(cursor: Cursor) -> None:
+    """ secondary indexes for lookups by contact, open meetings and not deleted contacts """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_connections_id_contact ON connections (id_contact)")
+    # covering for 'meetings of the contact ordered by date' and 'contacts without future meetings'
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_meetings_id_contact_date ON meetings (id_contact, date, status)")
+    # open meetings ( status < Status.DONE ) by date
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_meetings_open_date ON meetings (date) WHERE status < 20")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contacts_alive_name ON contacts (name, surname) WHERE deleted = 0")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_contacts_without_birthdate ON contacts (id)
+                      WHERE (birthdate IS NULL OR birthdate = '') AND deleted = 0""")
+
+
+SEARCH_SOURCES = [
+    # table, rowid offset, kind, id_contact, title, body, condition
+    ("contacts", 0, "contact", "{row}.id",
+     "{row}.name || ' ' || {row}.surname",
+     "coalesce({row}.note, '') || ' ' || coalesce({row}.birthdate, '')",
+     "{row}.deleted IS NOT TRUE"),
+    ("connections", 1, "connection", "{row}.id_contact",
+     "''",
+     " || ' ' || ".join(f"coalesce({{row}}.{column}, '')" for column in
+                        ["phone_privat", "phone_work", "phone_secret", "email_privat", "email_work", "email_secret",
+                         "whatsup", "telegram", "signal", "hangouts"]),
+     "{row}.deleted IS NOT TRUE"),
+    ("meetings", 2, "meeting", "{row}.id_contact",
+     "''",
+     "coalesce({row}.notes, '')",
+     "{row}.notes IS NOT NULL AND {row}.notes != ''"),
+]
+""" rows of the tables in full-text index search_index, rowid of the index = id * 4 + offset """
+
+
+SEARCH_UPDATE_COLUMNS = {
+    "contacts": "name, surname, birthdate, note, deleted",
+    "connections": "id_contact, phone_privat, phone_work, phone_secret, email_privat, email_work, email_secret, "
+                   "whatsup, telegram, signal, hangouts, deleted",
+    "meetings": "id_contact, notes",
+}
+""" indexed columns of SEARCH_SOURCES, update of derived columns ( birth_md, updated_at ) does not reindex the row """
+
+
+def search_values(offset: int, kind: str, id_contact: str, title: str, body: str, row: str) -> str:
+    return f"{row}.id * 4 + {offset}, {id_contact}, '{kind}', {title}, {body}".format(row=row)
+
+
+def create_search_update_trigger(cursor: Cursor, table: str) -> None:
+    _, offset, kind, id_contact, title, body, condition = next(source for source in SEARCH_SOURCES if source[0] == table)
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF {SEARCH_UPDATE_COLUMNS[table]} ON {table}
+                       BEGIN
+                           DELETE FROM search_index WHERE rowid = OLD.id * 4 + {offset};
+                           INSERT INTO search_index(rowid, id_contact, kind, title, body)
+                           SELECT {search_values(offset, kind, id_contact, title, body, 'NEW')} WHERE {condition.format(row='NEW')};
+                       END""")
+
+
+def migration_search(cursor: Cursor) -> None:
+    """ FTS5 full-text index over contacts, connections and meeting notes, maintained by triggers """
+    cursor.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                          id_contact UNINDEXED, kind UNINDEXED, title, body,
+                          prefix = '2 3', tokenize = 'unicode61 remove_diacritics 2')""")
+    # full rebuild: migration applied again ( PRAGMA user_version set back ) does not insert existing rowids
+    cursor.execute("DELETE FROM search_index")
+    for table, offset, kind, id_contact, title, body, condition in SEARCH_SOURCES:
+        cursor.execute(f"""INSERT INTO search_index(rowid, id_contact, kind, title, body)
+                           SELECT {search_values(offset, kind, id_contact, title, body, table)} FROM {table}
+                           WHERE {condition.format(row=table)}""")
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table}
+                           BEGIN
+                               INSERT INTO search_index(rowid, id_contact, kind, title, body)
+                               SELECT {search_values(offset, kind, id_contact, title, body, 'NEW')} WHERE {condition.format(row='NEW')};
+                           END""")
+        create_search_update_trigger(cursor, table)
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table}
+                           BEGIN
+                               DELETE FROM search_index WHERE rowid = OLD.id * 4 + {offset};
+                           END""")
+
+
+PHONE_COLUMNS = ["phone_privat", "phone_work", "phone_secret"]
+EMAIL_COLUMNS = ["email_privat", "email_work", "email_secret"]
+PHONE_MIN_DIGITS = 7
+""" shortest phone number ( without country and trunk prefix ) for reverse lookup """
+
+
+def normalize_phone(phone: str) -> Union[str, None]:
+    """
+    E.164-ish key of the phone number: only digits, without international '00'/'+' and national trunk '0' prefix,
+    reversed - numbers with and without country code share the same beginning of the key ( local part )
+    """
+    if not phone:
+        return None
+    digits = "".join(symbol for symbol in phone if symbol.isdigit())
+    if digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = digits[1:]
+    if len(digits) < PHONE_MIN_DIGITS:
+        return None
+    return digits[::-1]
+
+
+def normalize_email(email: str) -> Union[str, None]:
+    if not email or "@" not in email:
+        return None
+    return email.strip().lower()
+
+
+def identifiers_of(connection) -> List[Tuple[str, str]]:
+    """
+    :param connection: record with phone_* and email_* attributes ( Connection )
+    :return: list of unique ( kind, identifier ), kind: phone/email
+    """
+    identifiers = []
+    for column in PHONE_COLUMNS:
+        identifier = normalize_phone(getattr(connection, column))
+        if identifier and ("phone", identifier) not in identifiers:
+            identifiers.append(("phone", identifier))
+    for column in EMAIL_COLUMNS:
+        identifier = normalize_email(getattr(connection, column))
+        if identifier and ("email", identifier) not in identifiers:
+            identifiers.append(("email", identifier))
+    return identifiers
+
+
+def save_identifiers(cursor: Cursor, id_contact: int, connection) -> None:
+    """ replace identifiers of the contact with normalized phones and emails of the connection ( Connection ) """
+    cursor.execute("DELETE FROM identifiers WHERE id_contact = ?", (id_contact,))
+    if connection is None or connection.deleted:
+        return
+    cursor.executemany("INSERT OR IGNORE INTO identifiers(kind, identifier, id_contact) VALUES(?,?,?)",
+                       [(kind, identifier, id_contact) for kind, identifier in identifiers_of(connection)])
+
+
+def migration_identifiers(cursor: Cursor) -> None:
+    """ normalized phones and emails of the connections for reverse lookup """
+    cursor.execute("""CREATE TABLE IF NOT EXISTS identifiers (
+                          kind text NOT NULL,
+                          identifier text NOT NULL,
+                          id_contact integer NOT NULL,
+                          PRIMARY KEY (kind, identifier, id_contact),
+                          FOREIGN KEY (id_contact) REFERENCES contacts (id)
+                      ) WITHOUT ROWID""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_identifiers_id_contact ON identifiers (id_contact)")
+    rows = cursor.execute(f"""SELECT id_contact, {', '.join(PHONE_COLUMNS + EMAIL_COLUMNS)} 
+                              FROM connections WHERE deleted IS NOT TRUE""").fetchall()
+    for row in rows:
+        connection = Connection(None, row[0], row[1], row[2], row[3], row[4], row[5], row[6], None, None, None, None)
+        cursor.executemany("INSERT OR IGNORE INTO identifiers(kind, identifier, id_contact) VALUES(?,?,?)",
+                           [(kind, identifier, row[0]) for kind, identifier in identifiers_of(connection)])
+
+
+def migration_meetings_epoch(cursor: Cursor) -> None:
+    """ meetings.date from text '%Y-%m-%d %H:%M:%S' to integer seconds ( see EPOCH ) """
+    cursor.execute("UPDATE meetings SET date = CAST(strftime('%s', date) AS INTEGER) WHERE typeof(date) = 'text'")
+
+
+MEETING_SUMMARY_SQL = """INSERT OR REPLACE INTO meeting_summary(id_contact, next_open_id, next_open_date, next_open_status,
+                                                                   last_done_date, open_count)
+                         SELECT {id_contact},
+                                (SELECT id FROM meetings WHERE id_contact = {id_contact} AND status < 20 ORDER BY date, id LIMIT 1),
+                                (SELECT min(date) FROM meetings WHERE id_contact = {id_contact} AND status < 20),
+                                (SELECT status FROM meetings WHERE id_contact = {id_contact} AND status < 20 ORDER BY date, id LIMIT 1),
+                                (SELECT max(date) FROM meetings WHERE id_contact = {id_contact} AND status = 20),
+                                (SELECT count(*) FROM meetings WHERE id_contact = {id_contact} AND status < 20)"""
+""" recalculate summary row of one contact, every subquery is a range of idx_meetings_id_contact_date """
+
+
+def migration_meeting_summary(cursor: Cursor) -> None:
+    """
+    meeting_summary - per contact: next open ( TODO, ASKED ) meeting, last DONE meeting, amount of open meetings,
+    maintained by triggers on meetings
+    """
+    cursor.execute("""CREATE TABLE IF NOT EXISTS meeting_summary (
+                          id_contact integer PRIMARY KEY,
+                          next_open_id integer,
+                          next_open_date integer,
+                          next_open_status integer,
+                          last_done_date integer,
+                          open_count integer NOT NULL DEFAULT 0,
+                          FOREIGN KEY (id_contact) REFERENCES contacts (id)
+                      )""")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_meeting_summary_next_open_date ON meeting_summary (next_open_date)
+                      WHERE next_open_date IS NOT NULL""")
+    cursor.execute(MEETING_SUMMARY_SQL.format(id_contact="contact.id_contact") +
+                   " FROM (SELECT DISTINCT id_contact FROM meetings WHERE id_contact IS NOT NULL) contact")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS meetings_summary_insert AFTER INSERT ON meetings
+                       WHEN NEW.id_contact IS NOT NULL
+                       BEGIN
+                           {MEETING_SUMMARY_SQL.format(id_contact="NEW.id_contact")};
+                       END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS meetings_summary_update AFTER UPDATE OF id_contact, date, status ON meetings
+                       BEGIN
+                           {MEETING_SUMMARY_SQL.format(id_contact="OLD.id_contact")} WHERE OLD.id_contact IS NOT NULL;
+                           {MEETING_SUMMARY_SQL.format(id_contact="NEW.id_contact")} 
+                               WHERE NEW.id_contact IS NOT NULL AND NEW.id_contact IS NOT OLD.id_contact;
+                       END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS meetings_summary_delete AFTER DELETE ON meetings
+                       WHEN OLD.id_contact IS NOT NULL
+                       BEGIN
+                           {MEETING_SUMMARY_SQL.format(id_contact="OLD.id_contact")};
+                       END""")
+
+
+def migration_imports(cursor: Cursor) -> None:
+    """ checkpoints of the file imports ( resume after interruption ) and rejected records of the files """
+    cursor.execute("""CREATE TABLE IF NOT EXISTS imports (
+                          file_hash text PRIMARY KEY,
+                          file_path text,
+                          byte_offset integer NOT NULL DEFAULT 0,
+                          imported integer NOT NULL DEFAULT 0,
+                          skipped integer NOT NULL DEFAULT 0,
+                          rejected integer NOT NULL DEFAULT 0,
+                          started integer,
+                          finished integer
+                      )""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS import_rejects (
+                          id integer PRIMARY KEY,
+                          file_hash text NOT NULL,
+                          byte_offset integer NOT NULL,
+                          record text,
+                          error text
+                      )""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_import_rejects_file_hash ON import_rejects (file_hash, byte_offset)")
+
+
+NOW_SQL = "CAST(strftime('%s', 'now', 'localtime') AS INTEGER)"
+""" current time in seconds since EPOCH like adapt_datetime(datetime.now()) """
+CHANGED_COLUMNS = {
+    "contacts": "name, surname, birthdate, note, deleted",
+    "connections": "id_contact, phone_privat, phone_work, phone_secret, email_privat, email_work, email_secret, "
+                   "whatsup, telegram, signal, hangouts, deleted",
+    "meetings": "id_contact, date, status, notes",
+}
+""" columns of the data, update of them changes updated_at and is written to change_log ( derived columns are not ) """
+
+
+def add_updated_at(cursor: Cursor, table: str, columns: str) -> None:
+    """ updated_at of the table, set by the triggers on insert and on update of the columns, unless writer sets it """
+    if "updated_at" not in get_columns(cursor, table):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN updated_at integer")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_updated_at ON {table} (updated_at) WHERE updated_at IS NOT NULL")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_updated_at_insert AFTER INSERT ON {table}
+                       WHEN NEW.updated_at IS NULL
+                       BEGIN
+                           UPDATE {table} SET updated_at = {NOW_SQL} WHERE id = NEW.id;
+                       END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_updated_at_update AFTER UPDATE OF {columns} ON {table}
+                       WHEN NEW.updated_at IS OLD.updated_at
+                       BEGIN
+                           UPDATE {table} SET updated_at = {NOW_SQL} WHERE id = NEW.id;
+                       END""")
+
+
+def migration_updated_at(cursor: Cursor) -> None:
+    """
+    updated_at ( seconds since EPOCH ) of contacts and connections for incremental export, maintained by triggers,
+    writer can set it explicitly ( bulk import ), rows before the migration have NULL
+    """
+    for table in SEARCH_UPDATE_COLUMNS:
+        # search update triggers before the schema version 9 fired on any column: update of updated_at
+        # in the insert trigger reindexed the new row before its search insert trigger ( constraint failed )
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_search_update")
+        create_search_update_trigger(cursor, table)
+    for table in ["contacts", "connections"]:
+        add_updated_at(cursor, table, CHANGED_COLUMNS[table])
+
+
+CHANGE_LOG_CONTACT = {"contacts": "id", "connections": "id_contact", "meetings": "id_contact"}
+""" tables of the change log and their column with contacts.id """
+
+
+def migration_change_log(cursor: Cursor) -> None:
+    """
+    change_log - every insert, update ( of CHANGED_COLUMNS ) and delete of contacts, connections and meetings
+    with increasing seq ( AUTOINCREMENT: never reused, rolled back transactions do not leave gaps ),
+    written by triggers in the transaction of the change; meetings get updated_at too
+    """
+    add_updated_at(cursor, "meetings", CHANGED_COLUMNS["meetings"])
+    cursor.execute("""CREATE TABLE IF NOT EXISTS change_log (
+                          seq integer PRIMARY KEY AUTOINCREMENT,
+                          table_name text NOT NULL,
+                          row_id integer NOT NULL,
+                          id_contact integer,
+                          operation text NOT NULL,
+                          changed_at integer NOT NULL
+                      )""")
+    for table, contact_column in CHANGE_LOG_CONTACT.items():
+        for operation, event, row in [("insert", "INSERT", "NEW"), ("update", f"UPDATE OF {CHANGED_COLUMNS[table]}", "NEW"),
+                                      ("delete", "DELETE", "OLD")]:
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_change_log_{operation} AFTER {event} ON {table}
+                               BEGIN
+                                   INSERT INTO change_log(table_name, row_id, id_contact, operation, changed_at)
+                                   VALUES('{table}', {row}.id, {row}.{contact_column}, '{operation}', {NOW_SQL});
+                               END""")
+
+
+MIGRATIONS = [
+    migration_tables,
+    migration_birthday_key,
+    migration_indexes,
+    migration_search,
+    migration_identifiers,
+    migration_meetings_epoch,
+    migration_meeting_summary,
+    migration_imports,
+    migration_updated_at,
+    migration_change_log,
+]
+""" schema migrations, MIGRATIONS[n] upgrades database from PRAGMA user_version n to n+1, append only """
+
+
+def migrate_database(conn: DBConnection) -> bool:
+    """
+    upgrade schema of the database in place up to the last migration,
+    every migration is applied in own transaction together with the new PRAGMA user_version,
+    the version is read again under the write lock: concurrent starts apply every migration once
+    """
+    if conn is None:
+        return False
+    cursor: Cursor = None
+    try:
+        cursor = conn.cursor()
+        version: int = cursor.execute("PRAGMA user_version").fetchone()[0]
+        if version >= len(MIGRATIONS):
+            return True
+        while True:
+            conn.commit()
+            cursor.execute("BEGIN IMMEDIATE")
+            # other process could apply migrations between the read above and the write lock
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version >= len(MIGRATIONS):
+                conn.commit()
+                break
+            MIGRATIONS[version](cursor)
+            cursor.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        cursor.execute("PRAGMA optimize")
+        return True
+    except Error as e:
+        conn.rollback()
+        print(e, file = sys.stderr)
+        return False
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+
+def is_migrated(cursor: Cursor, migration: Callable[[Cursor], None]) -> bool:
+    """ migration is applied: read-only connections ( reports ) do not migrate and can see the older schema """
+    return cursor.execute("PRAGMA user_version").fetchone()[0] > MIGRATIONS.index(migration)
+
+
+CONNECTION_PROFILES = {
+    "local": {
+        # database file on local disk: write ahead log, readers do not block writer
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 256 * 1024 * 1024,
+        "busy_timeout": 10000,
+        "cached_statements": 256,
+    },
+    "network": {
+        # Dropbox or network file system: WAL and mmap need shared memory of one host, rollback journal only
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "busy_timeout": 30000,
+        "cached_statements": 256,
+    },
+}
+""" PRAGMA settings of the connection ( cache_size in KiB when negative, busy_timeout in ms ) """
+
+DB_PROFILE_DEFAULT = "network"
+""" README recommends Dropbox for the database file, WAL is opt-in """
+DB_PROFILE_ENV = "REMINDER_DB_PROFILE"
+""" environment variable with name of the connection profile, command line option '--profile=' has priority """
+
+
+def get_connection_profile(profile: str = None) -> dict:
+    name = profile or get_option("--profile") or os.environ.get(DB_PROFILE_ENV) or DB_PROFILE_DEFAULT
+    if name not in CONNECTION_PROFILES:
+        print(f"unknown profile of the connection: {name}, expected one of {list(CONNECTION_PROFILES)}", file = sys.stderr)
+        name = DB_PROFILE_DEFAULT
+    return CONNECTION_PROFILES[name]
+
+
+def read_only_uri(db_file: str, immutable: bool = False) -> str:
+    """
+    URI of the database file for read-only connection,
+    immutable - no locks at all, for snapshots only: changes of other processes in the meantime can be not visible or broken
+    """
+    path = os.path.abspath(db_file).replace("%", "%25").replace("?", "%3f").replace("#", "%23")
+    return f"file:{path}?mode=ro" + ("&immutable=1" if immutable else "")
+
+
+TRACE_SQL_ENV = "REMINDER_TRACE_SQL"
+""" environment variable: 1 - trace SQL statements, plan - trace with EXPLAIN QUERY PLAN, same as option '--trace-sql[=plan]' """
+TRACE_SQL_TOP = 10
+""" amount of the slowest statements in summary """
+
+
+class TracedStatement:
+    def __init__(self, sql: str, params, executions: int = 1):
+        self.sql = " ".join(sql.split())
+        self.params = params
+        self.executions = executions
+        """ amount of parameter sets for executemany """
+        self.rows = 0
+        self.seconds = 0.0
+        self.plan: List[str] = None
+        self.full_scan = False
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """
+    details of EXPLAIN QUERY PLAN, that read the whole table or the whole index ( SCAN ... USING [COVERING] INDEX ),
+    not scans of virtual tables ( search_index ), constant rows and results of subqueries ( CO-ROUTINE, MATERIALIZE )
+    """
+    subqueries = {detail.split(" ", 1)[1] for detail in plan if detail.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+    return [detail for detail in plan
+            if detail.startswith("SCAN ") and not detail.startswith(("SCAN CONSTANT ROW", "SCAN (subquery"))
+            and "VIRTUAL TABLE" not in detail and "INTEGER PRIMARY KEY" not in detail
+            and detail.split(" ")[1] not in subqueries]
+
+
+class SqlTrace:
+    """
+    every executed statement with parameters, fetched rows and wall time ( execute + fetch ),
+    optionally EXPLAIN QUERY PLAN with flag of full table scan, summary of the slowest statements on exit
+    """
+
+    def __init__(self, explain: bool = False, trace_file: str = None):
+        self.explain = explain
+        self.trace_file = trace_file
+        self.statements: List[TracedStatement] = []
+
+    def explain_plan(self, connection: DBConnection, statement: TracedStatement, sql: str, params) -> None:
+        words = sql.split(None, 1)
+        if not words or words[0].upper() not in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT"):
+            return
+        cursor = sqlite3.Cursor(connection)
+        try:
+            statement.plan = [row[3] for row in cursor.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            statement.full_scan = bool(full_scans(statement.plan))
+        except Error:
+            statement.plan = []
+        finally:
+            cursor.close()
+
+    def summary(self) -> None:
+        import json
+        if self.trace_file:
+            with open(self.trace_file, "w") as file:
+                for statement in self.statements:
+                    file.write(json.dumps({"sql": statement.sql, "params": repr(statement.params)[:200],
+                                           "executions": statement.executions, "rows": statement.rows,
+                                           "ms": round(statement.seconds * 1000, 3), "plan": statement.plan,
+                                           "full_scan": statement.full_scan}) + "\n")
+        by_sql = {}
+        for statement in self.statements:
+            total = by_sql.setdefault(statement.sql, [0, 0.0, 0.0, 0, statement.full_scan])
+            total[0] += 1
+            total[1] += statement.seconds
+            total[2] = max(total[2], statement.seconds)
+            total[3] += statement.rows
+        print(f"SQL: {len(self.statements)} statements, {sum(each.seconds for each in self.statements) * 1000:.1f} ms, "
+              f"the slowest ( count, total ms, max ms, rows ):", file=sys.stderr)
+        for sql, (count, seconds, max_seconds, rows, full_scan) in \
+                sorted(by_sql.items(), key=lambda each: -each[1][1])[:TRACE_SQL_TOP]:
+            print(f"{count:6d} {seconds * 1000:10.1f} {max_seconds * 1000:10.1f} {rows:8d} "
+                  f"{'FULL SCAN ' if full_scan else ''}{sql[:160]}", file=sys.stderr)
+
+
+SQL_TRACE: SqlTrace = None
+""" active trace of SQL statements, see get_sql_trace """
+
+
+def get_sql_trace() -> Union[SqlTrace, None]:
+    global SQL_TRACE
+    if SQL_TRACE is None:
+        mode = get_option("--trace-sql") or ("1" if "--trace-sql" in sys.argv else None) or os.environ.get(TRACE_SQL_ENV)
+        if not mode or mode == "0":
+            return None
+        import atexit
+        SQL_TRACE = SqlTrace(explain=(mode == "plan"), trace_file=get_option("--trace-file"))
+        atexit.register(SQL_TRACE.summary)
+    return SQL_TRACE
+
+
+class TracedCursor(sqlite3.Cursor):
+    """ cursor, that writes every statement to SQL_TRACE """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statement: TracedStatement = None
+
+    def execute(self, sql, params=()):
+        self.statement = TracedStatement(sql, params)
+        SQL_TRACE.statements.append(self.statement)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self.statement.seconds += time.perf_counter() - started
+            if SQL_TRACE.explain:
+                SQL_TRACE.explain_plan(self.connection, self.statement, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        self.statement = TracedStatement(sql, seq_of_params[:1], len(seq_of_params))
+        SQL_TRACE.statements.append(self.statement)
+        started = time.perf_counter()
+        try:
+            result = super().executemany(sql, seq_of_params)
+            self.statement.rows = self.rowcount
+            return result
+        finally:
+            self.statement.seconds += time.perf_counter() - started
+
+    def fetched(self, started: float, rows: int) -> None:
+        if self.statement is not None:
+            self.statement.seconds += time.perf_counter() - started
+            self.statement.rows += rows
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self.fetched(started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self.fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self.fetched(started, len(rows))
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self.fetched(started, 0)
+            raise
+        self.fetched(started, 1)
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    """ connection with TracedCursor, also for connection.execute """
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def set_journal_mode(conn: DBConnection, journal_mode: str) -> None:
+    """
+    only WAL is switched on: it is saved in the file, rollback journal ( DELETE ) is the default of every connection,
+    file in WAL stays in WAL - switching it back needs exclusive access, other process ( --profile=local ) can have it open
+    """
+    if journal_mode.upper() != "WAL" or conn.execute("PRAGMA journal_mode").fetchone()[0].upper() == "WAL":
+        return
     try:
-        conn: DBConnection = sqlite3.connect(db_file)  # creates a file-based database
+        conn.execute("PRAGMA journal_mode = WAL")
+    except Error as e:
+        print(f"journal mode is not changed to WAL: {e}", file=sys.stderr)
+
+
+def create_connection(db_file: str = DB_DEFAULT_PATH, profile: str = None, read_only: bool = False) -> DBConnection :
+    """
+    :param profile: name of the connection profile from CONNECTION_PROFILES, see get_connection_profile
+    :param read_only: do not create database file, do not change journal mode, 
+                      option '--immutable' skips locking of the file ( see read_only_uri )
+    """
+    settings = get_connection_profile(profile)
+    try:
+        # option '--trace-sql': all statements over TracedCursor
+        factory = TracedConnection if get_sql_trace() is not None else sqlite3.Connection
+        if read_only:
+            conn: DBConnection = sqlite3.connect(read_only_uri(db_file, "--immutable" in sys.argv), uri=True,
+                                                 timeout=settings["busy_timeout"] / 1000,
+                                                 cached_statements=settings["cached_statements"],
+                                                 detect_types=sqlite3.PARSE_COLNAMES,
+                                                 factory=factory)
+        else:
+            conn: DBConnection = sqlite3.connect(db_file,  # creates a file-based database
+                                                 timeout=settings["busy_timeout"] / 1000,
+                                                 cached_statements=settings["cached_statements"],
+                                                 detect_types=sqlite3.PARSE_COLNAMES,
+                                                 factory=factory)
+            set_journal_mode(conn, settings["journal_mode"])
+            conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+        conn.execute(f"PRAGMA cache_size = {settings['cache_size']}")
+        conn.execute(f"PRAGMA mmap_size = {settings['mmap_size']}")
+        conn.execute("PRAGMA temp_store = MEMORY")
         return conn
     except Error as e:
         print(e, file = sys.stderr)
         return None
 
 
+LOCAL_COPY_ENV = "REMINDER_DB_LOCAL_COPY"
+""" environment variable ( 1/true ) to work with local copy of the database, same as option '--local-copy' """
+LOCAL_COPY_CHECKPOINT_SECONDS = 300
+""" write changes of the local copy back to the database file not often than once in the period """
+
+
+def file_hash(path: str) -> Union[str, None]:
+    import hashlib
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_mtime(path: str) -> Union[float, None]:
+    return os.stat(path).st_mtime if os.path.exists(path) else None
+
+
+class WorkingCopy:
+    """
+    local copy of the database file ( Dropbox, network file system ):
+    copy with SQLite backup API on open, write back atomically on checkpoint and close,
+    database file changed by somebody else in the meantime is not overwritten - changes go to '<db>.conflict-*' file
+    """
+
+    def __init__(self, remote_path: str, checkpoint_seconds: int = LOCAL_COPY_CHECKPOINT_SECONDS):
+        self.remote_path = os.path.abspath(remote_path)
+        self.checkpoint_seconds = checkpoint_seconds
+        self.local_path: str = None
+        self.connection: DBConnection = None
+        self.remote_mtime: float = None
+        self.remote_hash: str = None
+        self.synced_state: Tuple[int, int] = None
+        self.synced_at: float = 0
+        self.conflict_path: str = None
+
+    def open(self) -> DBConnection:
+        import tempfile
+        handle, self.local_path = tempfile.mkstemp(prefix="reminder-", suffix=".db")
+        os.close(handle)
+        self.remote_mtime = file_mtime(self.remote_path)
+        self.remote_hash = file_hash(self.remote_path)
+        if self.remote_hash is not None:
+            remote = sqlite3.connect(read_only_uri(self.remote_path), uri=True)
+            local = sqlite3.connect(self.local_path)
+            try:
+                remote.backup(local)
+            finally:
+                local.close()
+                remote.close()
+        self.connection = create_connection(self.local_path, "local")
+        if self.connection is None:
+            return None
+        self.synced_state = self.state()
+        self.synced_at = time.monotonic()
+        return self.connection
+
+    def state(self) -> Tuple[int, int]:
+        """ changed rows and version of the schema ( DDL ) of the local copy """
+        return self.connection.total_changes, self.connection.execute("PRAGMA schema_version").fetchone()[0]
+
+    def remote_is_changed(self) -> bool:
+        if file_mtime(self.remote_path) == self.remote_mtime:
+            return False
+        return file_hash(self.remote_path) != self.remote_hash
+
+    def checkpoint(self, force: bool = False) -> bool:
+        """
+        write local copy back to the database file when there are changes and checkpoint period is over
+        :return: True when database file was written
+        """
+        if self.connection is None or self.state() == self.synced_state:
+            return False
+        if not force and time.monotonic() - self.synced_at < self.checkpoint_seconds:
+            return False
+        if self.connection.in_transaction:
+            self.connection.commit()
+
+        conflict = self.conflict_path is not None or self.remote_is_changed()
+        if conflict and self.conflict_path is None:
+            self.conflict_path = f"{self.remote_path}.conflict-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+            print(f"database file {self.remote_path} was changed by somebody else, "
+                  f"changes are saved to {self.conflict_path}", file = sys.stderr)
+        target_path = self.conflict_path if conflict else self.remote_path
+
+        temp_path = f"{target_path}.tmp-{os.getpid()}"
+        target = sqlite3.connect(temp_path)
+        try:
+            self.connection.backup(target)
+            target.execute("PRAGMA journal_mode = DELETE")
+            target.commit()
+        finally:
+            target.close()
+        os.replace(temp_path, target_path)
+
+        if not conflict:
+            self.remote_mtime = file_mtime(self.remote_path)
+            self.remote_hash = file_hash(self.remote_path)
+        self.synced_state = self.state()
+        self.synced_at = time.monotonic()
+        return True
+
+    def close(self) -> None:
+        """ write back the changes, remove the local copy ( also when open failed ) """
+        try:
+            if self.connection is not None:
+                try:
+                    if self.connection.in_transaction:
+                        self.connection.rollback()
+                    self.checkpoint(force=True)
+                finally:
+                    self.connection.close()
+                    self.connection = None
+        finally:
+            if self.local_path is not None:
+                for suffix in ["", "-wal", "-shm"]:
+                    if os.path.exists(self.local_path + suffix):
+                        os.remove(self.local_path + suffix)
+
+
+WORKING_COPY: WorkingCopy = None
+""" working copy of the database of the running application, if local copy mode is active """
+
+
+def is_local_copy_mode() -> bool:
+    return "--local-copy" in sys.argv or os.environ.get(LOCAL_COPY_ENV, "").lower() in ("1", "true", "yes")
+
+
+@contextmanager
+def open_database(db_file: str = DB_DEFAULT_PATH, read_only: bool = False):
+    """
+    connection to the database file or to its local working copy ( see is_local_copy_mode ),
+    commit at the end of the block like 'with create_connection(...)'
+    :param read_only: reports, connection without DDL and writes, local working copy is not needed for it
+    :return: None when database can't be opened
+    """
+    global WORKING_COPY
+    if read_only or not is_local_copy_mode():
+        connection = create_connection(db_file, read_only=read_only)
+        if connection is None:
+            yield None
+            return
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+        return
+
+    WORKING_COPY = WorkingCopy(db_file, get_int_option("--checkpoint", LOCAL_COPY_CHECKPOINT_SECONDS))
+    try:
+        connection = WORKING_COPY.open()
+        if connection is None:
+            yield None
+            return
+        with connection:
+            yield connection
+    finally:
+        WORKING_COPY.close()
+        WORKING_COPY = None
+
+
+def checkpoint_working_copy() -> None:
+    """ periodic write back of the local working copy, call it from the loop of the menu """
+    if WORKING_COPY is not None:
+        WORKING_COPY.checkpoint()
+
+
+IDENTITY_CACHE_SIZE = 256
+""" amount of records in IDENTITY_CACHE """
+DEBUG_CACHE_ENV = "REMINDER_DEBUG_CACHE"
+""" environment variable: 1 - print hits and misses of IDENTITY_CACHE at exit, same as option '--debug-cache' """
+
+
+class IdentityCache:
+    """
+    bounded LRU cache of the records read by id, key: ( kind, id, ...parameters of the query ),
+    writers of the application invalidate ( kind, id ) explicitly,
+    commits of other processes are detected by PRAGMA data_version and drop the whole cache
+    """
+
+    def __init__(self, size: int = IDENTITY_CACHE_SIZE):
+        self.size = size
+        self.records = OrderedDict()
+        self.data_version: Tuple[int, int] = None
+        """ ( id of the connection, PRAGMA data_version ) of the cached records """
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, connection: DBConnection, key: Tuple, load: Callable[[], object]):
+        """ cached record or result of load(), None is not cached """
+        data_version = (id(connection), connection.execute("PRAGMA data_version").fetchone()[0])
+        if data_version != self.data_version:
+            self.records.clear()
+            self.data_version = data_version
+        if key in self.records:
+            self.hits += 1
+            self.records.move_to_end(key)
+            return self.records[key]
+        self.misses += 1
+        record = load()
+        if record is not None:
+            self.records[key] = record
+            if len(self.records) > self.size:
+                self.records.popitem(last=False)
+                self.evictions += 1
+        return record
+
+    def invalidate(self, kind: str, id=None) -> None:
+        """ drop records of the kind with the id ( all records of the kind for id None ) """
+        for key in [key for key in self.records if key[0] == kind and (id is None or key[1] == id)]:
+            del self.records[key]
+            self.invalidations += 1
+
+    def summary(self) -> None:
+        requests = self.hits + self.misses
+        print(f"identity cache: {self.hits} hits, {self.misses} misses "
+              f"({self.hits * 100 / requests if requests else 0:.0f}% hits), {self.invalidations} invalidations, "
+              f"{self.evictions} evictions, {len(self.records)} of {self.size} records", file=sys.stderr)
+
+
+IDENTITY_CACHE = IdentityCache()
+if "--debug-cache" in sys.argv or os.environ.get(DEBUG_CACHE_ENV, "0") != "0":
+    import atexit
+    atexit.register(IDENTITY_CACHE.summary)
+
+
+CONTACT_COLUMNS = "id, name, surname, birthdate, note, deleted"
+""" columns of contacts in the order of Contact arguments: Contact(*row) """
+CONNECTION_COLUMNS = "id, id_contact, phone_privat, phone_work, phone_secret, email_privat, email_work, email_secret, " \
+                     "whatsup, telegram, signal, hangouts, deleted"
+""" columns of connections in the order of Connection arguments: Connection(*row) """
+
+
 class Contact:
+    __slots__ = ("id", "name", "surname", "birthdate", "note", "deleted")
+
     def __init__(self, id, name, surname, birthdate, note, deleted=False):
         self.id = id
         self.name = name
@@ -55,6 +1053,9 @@ class Contact:
 
 
 class Connection(object):
+    __slots__ = ("id", "id_contact", "phone_privat", "phone_work", "phone_secret", "email_privat", "email_work",
+                 "email_secret", "whatsup", "telegram", "signal", "hangouts", "deleted")
+
     def __init__(self, id, id_contact, phone_privat, phone_work, phone_secret, email_privat, email_work, email_secret,
                  whatsup, telegram, signal, hangouts, deleted=False):
         self.id = id
@@ -75,10 +1076,12 @@ class Connection(object):
         return f'{self.phone_privat} {self.email_privat} {self.whatsup} {self.telegram} {self.signal} {self.hangouts} {self.phone_work} {self.phone_secret} {self.email_work} {self.email_secret}'
 
     def __repr__(self) -> str:
-        return self._str_()
+        return self.__str__()
 
 
 class NetworkElement:
+    __slots__ = ("contact", "connection")
+
     def __init__(self, contact: Contact, connection: Connection):
         self.contact = contact
         self.connection = connection
@@ -87,7 +1090,7 @@ class NetworkElement:
         return f"{self.contact} {self.connection}"
 
     def __repr__(self) -> str:
-        return self._str_()
+        return self.__str__()
 
 class Status(Enum):
     TODO = 0
@@ -104,6 +1107,8 @@ class Status(Enum):
 
 
 class Meeting:
+    __slots__ = ("id", "id_contact", "date", "status", "notes")
+
     def __init__(self, id_contact: int, date: datetime, status: Status, notes: str = None, id: int = None):
         self.id = id
         """ id of the meeting from db:meetings.id """
@@ -124,17 +1129,16 @@ class Meeting:
         return None
 
 
-def get_contacts_by_name_and_surname(connection: DBConnection, name=None, surname=None) -> List[Contact]:
+def iter_contacts_by_name_and_surname(connection: DBConnection, name=None, surname=None) -> Iterator[Contact]:
     """
-    get contacts by name and surname
+    contacts by name and surname, read from the cursor one by one
     :param connection:
     :param name: part of the name '*name*'
     :param surname: part of the surname '*surname*'
-    :return: list of contacts
     """
+    cursor = connection.cursor()
     try:
-        cursor = connection.cursor()
-        query = "SELECT * FROM contacts WHERE 1=1 AND deleted = 0 "
+        query = f"SELECT {CONTACT_COLUMNS} FROM contacts WHERE 1=1 AND deleted = 0 "
         params = []
 
         if name:
@@ -146,31 +1150,221 @@ def get_contacts_by_name_and_surname(connection: DBConnection, name=None, surnam
             params.append('%' + surname + '%')
 
         cursor.execute(query, params)
+        yield from starmap(Contact, cursor)
+    finally:
+        cursor.close()
+
+
+def get_contacts_by_name_and_surname(connection: DBConnection, name=None, surname=None) -> List[Contact]:
+    return list(iter_contacts_by_name_and_surname(connection, name, surname))
+
+
+def iter_contacts_without_birthdays(connection: DBConnection) -> Iterator[Contact]:
+    cur = connection.cursor()
+    try:
+        cur.execute(f"SELECT {CONTACT_COLUMNS} FROM contacts WHERE (birthdate IS NULL OR birthdate = '') AND deleted = 0")
+        yield from starmap(Contact, cur)
+    finally:
+        cur.close()
+
+
+def get_contacts_without_birthdays(connection: DBConnection) -> List[Contact]:
+    return list(iter_contacts_without_birthdays(connection))
+
+
+def search_query(text: str) -> str:
+    """ FTS5 query: every word of the text as prefix, all of them must match """
+    words = text.split()
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+def search_everything(connection: DBConnection, text: str, limit: int = 50) -> List[Tuple[Contact, str, str]]:
+    """
+    full-text search over contacts, connections and meeting notes
+    :param text: words or beginnings of the words, '*' is not needed
+    :return: ranked list of ( contact, kind of the found record: contact/connection/meeting, matched fragment )
+    """
+    query = search_query(text)
+    if not query:
+        return []
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT c.id, c.name, c.surname, c.birthdate, c.note, s.kind,
+                   snippet(search_index, -1, '[', ']', '...', 8)
+            FROM search_index s INNER JOIN contacts c ON c.id = s.id_contact
+            WHERE search_index MATCH ? AND c.deleted IS NOT TRUE
+            ORDER BY bm25(search_index, 0, 0, 10.0, 1.0)
+            LIMIT ?
+            """, (query, limit))
+        return [(Contact(row[0], row[1], row[2], row[3], row[4]), row[5], row[6]) for row in cursor]
+    finally:
+        cursor.close()
+
+
+PAGE_SIZE = 20
+""" rows on one page of the selection lists, command line option --page-size """
 
-        contacts: List[Contact] = []
-        for row in cursor:  # cursor.fetchall():
-            contact = Contact(row[0], row[1], row[2], row[3], row[4])
-            contacts.append(contact)
+Pages = Callable[[Union[Tuple, None], bool, Union[int, None]], List[Tuple[Tuple, object]]]
+""" pages(key, forward, limit) -> [( key, item )] after ( forward ) or before the key, always in ascending order """
 
-        return contacts
+
+def keyset_page(connection: DBConnection, sql: str, params, key_columns: List[str], key: Tuple = None,
+                forward: bool = True, limit: int = None) -> List[tuple]:
+    """
+    one page of the query by seek ( instead of OFFSET ): rows after or before the key in ascending order of key_columns
+    :param sql: 'SELECT ... WHERE ...' without ORDER BY and LIMIT
+    :param key_columns: not null expressions, unique together ( last one is usually id )
+    :param limit: None - all rows after/before the key
+    """
+    params = list(params)
+    if key is not None:
+        sql += f" AND ({', '.join(key_columns)}) {'>' if forward else '<'} ({', '.join('?' * len(key_columns))})"
+        params += list(key)
+    direction = "ASC" if forward else "DESC"
+    sql += " ORDER BY " + ", ".join(f"{column} {direction}" for column in key_columns)
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    cursor = connection.cursor()
+    try:
+        rows = cursor.execute(sql, params).fetchall()
     finally:
         cursor.close()
+    return rows if forward else rows[::-1]
+
 
+def list_pages(items: List) -> Pages:
+    """ pages of already loaded list, key is the position in the list """
+    def pages(key: Union[Tuple, None], forward: bool, limit: Union[int, None]) -> List[Tuple[Tuple, object]]:
+        if forward:
+            start = key[0] + 1 if key else 0
+            end = len(items) if limit is None else min(len(items), start + limit)
+        else:
+            end = key[0] if key else len(items)
+            start = 0 if limit is None else max(0, end - limit)
+        return [((position,), items[position]) for position in range(start, end)]
+    return pages
 
-def get_contacts_without_birthdays(connection: Connection) -> List[Contact]:
+
+CONTACT_NAME_KEY = ["c.name", "c.surname", "c.id"]
+""" keyset of contacts c in alphabetical order """
+
+
+def contact_pages(connection: DBConnection, condition: str = "", params=(), join: str = "",
+                  key_columns: List[str] = None) -> Pages:
+    """
+    pages of not deleted contacts c
+    :param condition: additional ' AND ...' of WHERE
+    :param join: additional joins to contacts c
+    :param key_columns: order of the contacts, CONTACT_NAME_KEY by default
+    """
+    key_columns = key_columns or CONTACT_NAME_KEY
+    sql = f"""SELECT c.id, c.name, c.surname, c.birthdate, c.note, {', '.join(key_columns)}
+              FROM contacts c {join} WHERE c.deleted = 0 {condition}"""
+
+    def pages(key: Union[Tuple, None], forward: bool, limit: Union[int, None]) -> List[Tuple[Tuple, Contact]]:
+        return [(row[5:], Contact(*row[:5])) for row in keyset_page(connection, sql, params, key_columns, key, forward, limit)]
+    return pages
+
+
+SQL_MAX_IDS_IN_QUERY = 500
+""" amount of ids in one 'IN (?,?...)' clause, lower than SQLITE_MAX_VARIABLE_NUMBER of old SQLite versions """
+
+
+def iter_network_elements(connection: DBConnection, ids: Iterable[int]) -> Iterator[NetworkElement]:
+    """
+    contacts with their connections in one joined query per SQL_MAX_IDS_IN_QUERY ids,
+    ids ( also generator ) are consumed and elements are returned chunk by chunk
+    :param ids: contacts.id
+    :return: elements in the order of ids, not existing ids are skipped
+    """
+    ids = iter(ids)
+    cursor = connection.cursor()
     try:
-        cur = connection.cursor()
-        cur.execute("SELECT * FROM contacts WHERE (birthdate IS NULL OR birthdate = '') AND deleted = 0")
+        while True:
+            chunk = list(islice(ids, SQL_MAX_IDS_IN_QUERY))
+            if not chunk:
+                break
+            elements = {}
+            cursor.execute(f"""
+                SELECT c.id, c.name, c.surname, c.birthdate, c.note, c.deleted,
+                       cn.id, cn.id_contact, cn.phone_privat, cn.phone_work, cn.phone_secret,
+                       cn.email_privat, cn.email_work, cn.email_secret,
+                       cn.whatsup, cn.telegram, cn.signal, cn.hangouts, cn.deleted
+                FROM contacts c LEFT JOIN connections cn ON cn.id_contact = c.id
+                WHERE c.id IN ({','.join('?' * len(chunk))})
+                ORDER BY c.id, cn.id
+                """, chunk)
+            for row in cursor:
+                if row[0] in elements:
+                    # first connection of the contact only, like get_network_element
+                    continue
+                contact = Contact(*row[0:6])
+                connection_of_contact = Connection(*row[6:19]) if row[6] is not None else None
+                elements[row[0]] = NetworkElement(contact, connection_of_contact)
+            yield from (elements[id] for id in chunk if id in elements)
+    finally:
+        cursor.close()
+
+
+def get_cached_network_element(connection: DBConnection, id_contact: int) -> Union[NetworkElement, None]:
+    """ contact with the first connection from IDENTITY_CACHE, writers must invalidate ( "element", id_contact ) """
+    return IDENTITY_CACHE.get(connection, ("element", id_contact),
+                              lambda: next(iter_network_elements(connection, [id_contact]), None))
 
-        contacts: List[Contact] = []
-        for row in cur:
-            contact = Contact(row[0], row[1], row[2], row[3], row[4])
-            contacts.append(contact)
 
-        return contacts
+def get_network_elements(connection: DBConnection, ids: List[int]) -> List[NetworkElement]:
+    """ list of iter_network_elements """
+    return list(iter_network_elements(connection, ids))
+
+
+def lookup_contact_ids(connection: DBConnection, identifier: str) -> List[int]:
+    """
+    find contacts by phone number or email with index probes of the table identifiers ( no scan )
+    phone numbers match with and without country code: stored number ends with the given one or vice versa
+    """
+    cursor = connection.cursor()
+    try:
+        if "@" in identifier:
+            cursor.execute("""SELECT i.id_contact FROM identifiers i INNER JOIN contacts c ON c.id = i.id_contact
+                              WHERE i.kind = 'email' AND i.identifier = ? AND c.deleted IS NOT TRUE""",
+                           (normalize_email(identifier),))
+        else:
+            key = normalize_phone(identifier)
+            if key is None:
+                return []
+            # stored key starts with the given key ( longer number ) or is one of the beginnings of the given key
+            shorter_keys = [key[:length] for length in range(PHONE_MIN_DIGITS, len(key))]
+            cursor.execute(f"""SELECT c.id FROM contacts c
+                               WHERE c.deleted IS NOT TRUE AND c.id IN (
+                                   SELECT id_contact FROM identifiers
+                                   WHERE kind = 'phone' AND identifier >= ? AND identifier < ?
+                                   UNION ALL
+                                   SELECT id_contact FROM identifiers
+                                   WHERE kind = 'phone' AND identifier IN ({','.join('?' * len(shorter_keys)) or "''"}))""",
+                           [key, key + ":"] + shorter_keys)
+        return [row[0] for row in cursor]
     finally:
-        if cur:
-            cur.close()
+        cursor.close()
+
+
+def get_arguments() -> List[str]:
+    """ command line arguments without options '--name=value' """
+    return [each_argument for each_argument in sys.argv if not each_argument.startswith("--")]
+
+
+def get_option(name: str, default: str = None) -> str:
+    """ value of the command line option in format '--name=value' """
+    for each_argument in sys.argv[1:]:
+        if each_argument.startswith(name + "="):
+            return each_argument[len(name) + 1:]
+    return default
+
+
+def get_int_option(name: str, default: int) -> int:
+    value = get_option(name)
+    return int(value) if value else default
 
 
 class GoBack(Exception):
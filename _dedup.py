@@ -0,0 +1,183 @@
+import unicodedata
+from itertools import groupby
+from sqlite3 import Connection as DBConnection, Cursor
+from typing import Dict, Iterator, List, Set, Tuple, Union
+
+from _common import PHONE_MIN_DIGITS, IDENTITY_CACHE, get_network_elements, save_identifiers
+
+DEDUP_KEYS = ["phone", "email", "name"]
+""" blocking keys of the duplicates: normalized phone ( identifiers ), lowercased email ( identifiers ), normalized name """
+DEDUP_STRONG_KEYS = ["phone", "email"]
+""" keys for automatic merge, equal names are not enough """
+MERGED_COLUMNS = ["phone_privat", "phone_work", "phone_secret", "email_privat", "email_work", "email_secret",
+                  "whatsup", "telegram", "signal", "hangouts"]
+""" empty columns of the kept connection are filled from the merged duplicates """
+
+
+class DuplicateGroup:
+    __slots__ = ("ids", "keys")
+
+    def __init__(self, ids: List[int], keys: Set[str]):
+        self.ids = ids
+        """ contacts.id of the same person, ascending """
+        self.keys = keys
+        """ DEDUP_KEYS, that matched inside of the group """
+
+    def __repr__(self) -> str:
+        return f"{self.ids} by {', '.join(sorted(self.keys))}"
+
+
+def normalize_name(name: str, surname: str) -> Union[str, None]:
+    """
+    blocking key of the person: unique words of name and surname in lower case, without diacritics, sorted
+    ( Google import repeats given name in the surname: 'Anna Schmidt', 'Anna  Schmidt' -> 'anna schmidt' )
+    """
+    text = unicodedata.normalize("NFKD", f"{name or ''} {surname or ''}").lower()
+    words = {"".join(symbol for symbol in word if symbol.isalnum()) for word in text.split()} - {""}
+    return " ".join(sorted(words)) if words else None
+
+
+def identifier_pairs(cursor: Cursor, kind: str) -> Iterator[Tuple[int, int]]:
+    """
+    pairs of contacts with the same email or phone, one pass over identifiers in the order of the primary key,
+    phones are blocked by the last PHONE_MIN_DIGITS digits and match, when one number ends with the other one
+    ( with and without country code, see normalize_phone )
+    """
+    cursor.execute("""SELECT i.identifier, i.id_contact FROM identifiers i INNER JOIN contacts c ON c.id = i.id_contact
+                      WHERE i.kind = ? AND c.deleted = 0 ORDER BY i.identifier""", (kind,))
+    block_of = (lambda row: row[0][:PHONE_MIN_DIGITS]) if kind == "phone" else (lambda row: row[0])
+    for _, rows in groupby(cursor, key=block_of):
+        rows = list(rows)
+        for index, (identifier, id_contact) in enumerate(rows):
+            for other_identifier, other_id_contact in rows[index + 1:]:
+                if id_contact != other_id_contact and other_identifier.startswith(identifier):
+                    yield id_contact, other_id_contact
+
+
+def name_pairs(cursor: Cursor) -> Iterator[Tuple[int, int]]:
+    """ pairs of contacts with the same normalize_name, one pass over contacts with hash of the keys """
+    first_id_of: Dict[str, int] = {}
+    cursor.execute("SELECT id, name, surname FROM contacts WHERE deleted = 0")
+    for id_contact, name, surname in cursor:
+        key = normalize_name(name, surname)
+        if key is None:
+            continue
+        first_id = first_id_of.setdefault(key, id_contact)
+        if first_id != id_contact:
+            yield first_id, id_contact
+
+
+def find_duplicates(connection: DBConnection, keys: List[str] = None) -> List[DuplicateGroup]:
+    """
+    groups of not deleted contacts, connected by equal blocking keys ( transitive: a-b by phone, b-c by name ),
+    linear in amount of contacts and identifiers, no comparison of every pair
+    :param keys: subset of DEDUP_KEYS
+    """
+    parent: Dict[int, int] = {}
+    keys_of_root: Dict[int, Set[str]] = {}
+
+    def root(id_contact: int) -> int:
+        while parent.get(id_contact, id_contact) != id_contact:
+            parent[id_contact] = parent.get(parent[id_contact], parent[id_contact])
+            id_contact = parent[id_contact]
+        return id_contact
+
+    cursor = connection.cursor()
+    try:
+        for key in keys or DEDUP_KEYS:
+            pairs = name_pairs(cursor) if key == "name" else identifier_pairs(cursor, key)
+            for first, second in pairs:
+                parent.setdefault(first, first)
+                parent.setdefault(second, second)
+                first_root, second_root = root(first), root(second)
+                if first_root != second_root:
+                    first_root, second_root = min(first_root, second_root), max(first_root, second_root)
+                    parent[second_root] = first_root
+                    keys_of_root.setdefault(first_root, set()).update(keys_of_root.pop(second_root, set()))
+                keys_of_root.setdefault(first_root, set()).add(key)
+    finally:
+        cursor.close()
+
+    members: Dict[int, List[int]] = {}
+    for id_contact in parent:
+        members.setdefault(root(id_contact), []).append(id_contact)
+    return [DuplicateGroup(sorted(ids), keys_of_root.get(group_root, set()))
+            for group_root, ids in sorted(members.items()) if len(ids) > 1]
+
+
+def choose_kept_contact(connection: DBConnection, ids: List[int]) -> int:
+    """ contact with the most meetings, the oldest one for equal amount """
+    rows = connection.execute(f"""SELECT id_contact, count(*) FROM meetings
+                                  WHERE id_contact IN ({','.join('?' * len(ids))}) GROUP BY id_contact""", ids).fetchall()
+    meetings = dict(rows)
+    return min(ids, key=lambda id_contact: (-meetings.get(id_contact, 0), id_contact))
+
+
+def merge_contacts(connection: DBConnection, kept_id: int, duplicate_ids: List[int]) -> int:
+    """
+    merge duplicates into the kept contact in one transaction:
+    meetings are moved to the kept contact, its empty birthdate, note, phones, emails and messengers are filled
+    from the duplicates, duplicates are soft-deleted ( deleted = TRUE )
+    :return: amount of moved meetings
+    """
+    duplicate_ids = [id_contact for id_contact in duplicate_ids if id_contact != kept_id]
+    if not duplicate_ids:
+        return 0
+    elements = get_network_elements(connection, [kept_id] + duplicate_ids)
+    if not elements or elements[0].contact.id != kept_id:
+        return 0
+    kept, duplicates = elements[0], elements[1:]
+    for duplicate in duplicates:
+        for field in ["birthdate", "note"]:
+            if not getattr(kept.contact, field) and getattr(duplicate.contact, field):
+                setattr(kept.contact, field, getattr(duplicate.contact, field))
+        if kept.connection is not None and duplicate.connection is not None:
+            values = {getattr(kept.connection, column) for column in MERGED_COLUMNS}
+            for column in MERGED_COLUMNS:
+                value = getattr(duplicate.connection, column)
+                if not getattr(kept.connection, column) and value and value not in values:
+                    setattr(kept.connection, column, value)
+                    values.add(value)
+
+    placeholders = ','.join('?' * len(duplicate_ids))
+    cursor = connection.cursor()
+    try:
+        connection.commit()
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(f"UPDATE meetings SET id_contact = ? WHERE id_contact IN ({placeholders})", [kept_id] + duplicate_ids)
+        moved = cursor.rowcount
+        cursor.execute("UPDATE contacts SET birthdate = ?, note = ? WHERE id = ?",
+                       (kept.contact.birthdate, kept.contact.note, kept_id))
+        if kept.connection is not None:
+            cursor.execute(f"UPDATE connections SET {', '.join(column + ' = ?' for column in MERGED_COLUMNS)} WHERE id = ?",
+                           [getattr(kept.connection, column) for column in MERGED_COLUMNS] + [kept.connection.id])
+            save_identifiers(cursor, kept_id, kept.connection)
+        cursor.execute(f"UPDATE contacts SET deleted = TRUE WHERE id IN ({placeholders})", duplicate_ids)
+        cursor.execute(f"UPDATE connections SET deleted = TRUE WHERE id_contact IN ({placeholders})", duplicate_ids)
+        cursor.execute(f"DELETE FROM identifiers WHERE id_contact IN ({placeholders})", duplicate_ids)
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    for id_contact in [kept_id] + duplicate_ids:
+        IDENTITY_CACHE.invalidate("element", id_contact)
+        IDENTITY_CACHE.invalidate("meetings", id_contact)
+    return moved
+
+
+def merge_duplicates(connection: DBConnection, groups: List[DuplicateGroup]) -> Tuple[int, int]:
+    """
+    automatic merge of the groups found by DEDUP_STRONG_KEYS, groups matched only by name are skipped
+    :return: ( amount of merged groups, amount of soft-deleted contacts )
+    """
+    merged, deleted = 0, 0
+    for group in groups:
+        if not group.keys & set(DEDUP_STRONG_KEYS):
+            continue
+        kept_id = choose_kept_contact(connection, group.ids)
+        merge_contacts(connection, kept_id, group.ids)
+        merged += 1
+        deleted += len(group.ids) - 1
+    return merged, deleted
@@ -0,0 +1,148 @@
+import json
+from datetime import datetime
+from sqlite3 import Connection as DBConnection
+from typing import Iterator, List, TextIO, Union
+
+from _changes import check_not_pruned
+from _common import Status, adapt_datetime
+from _vcard import escape, fold
+
+EXPORT_FORMATS = ["csv", "jsonl", "vcard"]
+EXPORT_COLUMNS = ["id", "name", "surname", "birthdate", "note", "deleted",
+                  "phone_privat", "phone_work", "phone_secret", "email_privat", "email_work", "email_secret",
+                  "whatsup", "telegram", "signal", "hangouts",
+                  "next_meeting_date", "next_meeting_status", "last_meeting_date", "open_meetings", "updated_at"]
+""" columns of one exported contact: contact, first connection ( like iter_network_elements ), meeting_summary """
+
+EXPORT_SQL = """SELECT c.id, c.name, c.surname, c.birthdate, c.note, c.deleted,
+                       cn.phone_privat, cn.phone_work, cn.phone_secret, cn.email_privat, cn.email_work, cn.email_secret,
+                       cn.whatsup, cn.telegram, cn.signal, cn.hangouts,
+                       datetime(s.next_open_date, 'unixepoch'), s.next_open_status, datetime(s.last_done_date, 'unixepoch'),
+                       coalesce(s.open_count, 0),
+                       datetime(nullif(max(coalesce(c.updated_at, 0), coalesce(cn.updated_at, 0)), 0), 'unixepoch')
+                FROM contacts c
+                LEFT JOIN connections cn ON cn.id = (SELECT min(id) FROM connections WHERE id_contact = c.id)
+                LEFT JOIN meeting_summary s ON s.id_contact = c.id
+                WHERE {condition}
+                ORDER BY c.id"""
+""" one pass in the order of the primary key, connection and summary are index lookups, nothing is sorted """
+
+
+def parse_since(value: str) -> int:
+    """
+    --since=2026-10-01, --since=2026-10-01T22:00:00 ( local time ), --since=2026-10-01T20:00:00Z ( with UTC offset )
+    or seconds since EPOCH -> seconds since EPOCH
+    """
+    if value.isdigit():
+        return int(value)
+    since = datetime.fromisoformat(value)
+    if since.tzinfo is not None:
+        # updated_at is local time without time zone
+        since = since.astimezone().replace(tzinfo=None)
+    return adapt_datetime(since)
+
+
+def iter_export_rows(connection: DBConnection, since: int = None, since_seq: int = None) -> Iterator[tuple]:
+    """
+    rows of EXPORT_COLUMNS streamed from the cursor, memory does not depend on the size of the Database
+    :param since: contacts changed at or after updated_at ( see migration_updated_at ), deleted ones too,
+                  None - all not deleted contacts
+    :param since_seq: contacts with changes of the contact, connections or meetings after seq of change_log
+    """
+    if since_seq is not None:
+        check_not_pruned(connection, since_seq)
+    return read_export_rows(connection, since, since_seq)
+
+
+def read_export_rows(connection: DBConnection, since: int = None, since_seq: int = None) -> Iterator[tuple]:
+    cursor = connection.cursor()
+    try:
+        if since_seq is not None:
+            cursor.execute(EXPORT_SQL.format(condition="c.id IN (SELECT id_contact FROM change_log WHERE seq > ?)"),
+                           (since_seq,))
+        elif since is None:
+            cursor.execute(EXPORT_SQL.format(condition="c.deleted = 0"))
+        else:
+            # two ranges of idx_contacts_updated_at and idx_connections_updated_at instead of scan of the join
+            cursor.execute(EXPORT_SQL.format(condition="""c.id IN (SELECT id FROM contacts WHERE updated_at >= ?
+                                                                  UNION SELECT id_contact FROM connections WHERE updated_at >= ?)"""),
+                           (since, since))
+        for row in cursor:
+            if row[17] is not None:
+                row = row[:17] + (Status(row[17]).name,) + row[18:]
+            yield row
+    finally:
+        cursor.close()
+
+
+def write_csv(rows: Iterator[tuple], file: TextIO) -> int:
+    import csv
+    writer = csv.writer(file)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_jsonl(rows: Iterator[tuple], file: TextIO) -> int:
+    count = 0
+    for row in rows:
+        file.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def vcard_of_row(row: Union[tuple, List]) -> str:
+    """ vCard 4.0 of the exported row, readable by VCardAdapter of the import """
+    values = dict(zip(EXPORT_COLUMNS, row))
+    lines = ["BEGIN:VCARD", "VERSION:4.0",
+             f"UID:urn:contacts-manager:{values['id']}",
+             f"FN:{escape(' '.join(part for part in (values['name'], values['surname']) if part))}",
+             f"N:{escape(values['surname'])};{escape(values['name'])};;;"]
+    for column, types in [("phone_privat", "cell"), ("phone_work", "work"), ("phone_secret", "home")]:
+        if values[column]:
+            lines.append(f"TEL;TYPE={types}:{escape(values[column])}")
+    for column, types in [("email_privat", "home"), ("email_work", "work"), ("email_secret", "other")]:
+        if values[column]:
+            lines.append(f"EMAIL;TYPE={types}:{escape(values[column])}")
+    for column, messenger in [("whatsup", "whatsapp"), ("telegram", "telegram"), ("signal", "signal"), ("hangouts", "hangouts")]:
+        if values[column]:
+            lines.append(f"IMPP;TYPE={messenger}:{escape(values[column])}")
+    if values["birthdate"]:
+        lines.append(f"BDAY:{values['birthdate']}")
+    if values["note"]:
+        lines.append(f"NOTE:{escape(values['note'])}")
+    if values["updated_at"]:
+        lines.append(f"REV:{values['updated_at'].replace('-', '').replace(':', '').replace(' ', 'T')}")
+    lines.append("END:VCARD")
+    return "".join(map(fold, lines))
+
+
+def write_vcard(rows: Iterator[tuple], file: TextIO) -> int:
+    """ deleted contacts ( --since ) are not written, vCard has no deletion mark """
+    count = 0
+    for row in rows:
+        if not row[5]:
+            file.write(vcard_of_row(row))
+            count += 1
+    return count
+
+
+EXPORT_WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "vcard": write_vcard}
+
+
+def export_network(connection: DBConnection, file: TextIO, export_format: str = "csv", since: int = None,
+                   since_seq: int = None) -> int:
+    """
+    stream contacts with connections and meeting summary to the file
+    :param export_format: one of EXPORT_FORMATS
+    :param since, since_seq: see iter_export_rows
+    :return: amount of written contacts
+    """
+    rows = iter_export_rows(connection, since, since_seq)
+    try:
+        return EXPORT_WRITERS[export_format](rows, file)
+    finally:
+        rows.close()
@@ -0,0 +1,619 @@
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from sqlite3 import Connection as DBConnection, Cursor
+from typing import BinaryIO, Callable, Dict, Iterator, List, Set, Tuple, Union
+
+from _common import Connection, Contact, NetworkElement, identifiers_of, SQL_MAX_IDS_IN_QUERY, file_hash, \
+    adapt_datetime
+from _vcard import read_vcard_records, parse_vcard, split_unescaped, unescape
+
+IMPORT_BATCH_SIZE = 1000
+""" amount of contacts written in one transaction """
+IMPORT_QUEUE_CHUNKS_PER_WORKER = 2
+""" parsed and parsing chunks per worker waiting for the writer, limit of the memory """
+
+
+google_contact_columns = ["Name", "Given Name", "Additional Name", "Family Name", "Yomi Name", "Given Name Yomi",
+                          "Additional Name Yomi", "Family Name Yomi", "Name Prefix", "Name Suffix", "Initials",
+                          "Nickname", "Short Name", "Maiden Name", "Birthday", "Gender", "Location",
+                          "Billing Information", "Directory Server", "Mileage", "Occupation", "Hobby", "Sensitivity",
+                          "Priority", "Subject", "Notes", "Language", "Photo", "Group Membership", "E-mail 1 - Type",
+                          "E-mail 1 - Value", "E-mail 2 - Type", "E-mail 2 - Value", "IM 1 - Type", "IM 1 - Service",
+                          "IM 1 - Value", "Phone 1 - Type", "Phone 1 - Value", "Phone 2 - Type", "Phone 2 - Value",
+                          "Phone 3 - Type", "Phone 3 - Value", "Phone 4 - Type", "Phone 4 - Value", "Phone 5 - Type",
+                          "Phone 5 - Value", "Address 1 - Type", "Address 1 - Formatted", "Address 1 - Street",
+                          "Address 1 - City", "Address 1 - PO Box", "Address 1 - Region", "Address 1 - Postal Code",
+                          "Address 1 - Country", "Address 1 - Extended Address", "Address 2 - Type",
+                          "Address 2 - Formatted", "Address 2 - Street", "Address 2 - City", "Address 2  - PO Box",
+                          "Address 2 - Region", "Address 2 - Postal Code", "Address 2 - Country",
+                          "Address 2 - Extended Address", "Organization 1 - Type", "Organization 1 - Name",
+                          "Organization 1 - Yomi Name", "Organization 1 - Title", "Organization 1 - Department",
+                          "Organization 1 - Symbol", "Organization 1 - Location", "Organization  1 - Job Description",
+                          "Website 1 - Type", "Website 1 - Value"]
+
+
+def google_column_positions(header: List[str]) -> Dict[str, int]:
+    """
+    resolve positions of the columns once from the header row of the file,
+    :return: map column name -> position, columns missing in the file are not in the map
+    """
+    positions = {}
+    for position, column in enumerate(header):
+        positions.setdefault(column.strip(), position)
+    return positions
+
+
+CSV_RECORD_MAX_LINES = 1000
+CSV_RECORD_MAX_BYTES = 128 * 1024
+""" longest csv record ( default field_size_limit of the csv module ), longer one has a stray quote """
+
+
+def read_csv_records(file: BinaryIO) -> Iterator[bytes]:
+    """
+    raw csv records of the binary file, one record can have several lines ( line breaks inside of quoted value ):
+    record ends with the line, where amount of the quotes is even ( escaped quote "" is a pair too ),
+    quote not closed within CSV_RECORD_MAX_LINES / CSV_RECORD_MAX_BYTES or till the end of the file is broken:
+    its first line is the record ( rejected by the parser ), the following lines are split again
+    """
+    from collections import deque
+    lines = iter(file)
+    again = deque()
+    record = []
+    quotes = 0
+    size = 0
+    while True:
+        line = again.popleft() if again else next(lines, None)
+        if line is not None:
+            record.append(line)
+            quotes += line.count(b'"')
+            size += len(line)
+            if quotes % 2 == 0:
+                yield b"".join(record) if len(record) > 1 else line
+                record, quotes, size = [], 0, 0
+                continue
+            if len(record) < CSV_RECORD_MAX_LINES and size < CSV_RECORD_MAX_BYTES:
+                continue
+        elif not record:
+            return
+        yield record[0]
+        again.extendleft(reversed(record[1:]))
+        record, quotes, size = [], 0, 0
+
+
+def read_chunks(records: Iterator[bytes], start: int, rows_per_chunk: int) -> Iterator[Tuple[int, List[bytes]]]:
+    """
+    ( byte offset, raw records ) by rows_per_chunk records, split at the record boundaries without parsing
+    :param records: consecutive records of the file, see ImportAdapter.read_records
+    :param start: byte offset of the first record
+    """
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= rows_per_chunk:
+            yield start, chunk
+            start += sum(map(len, chunk))
+            chunk = []
+    if chunk:
+        yield start, chunk
+
+
+class ImportChunk:
+    """ parsed part of the file between byte offsets start and end """
+    __slots__ = ("start", "end", "elements", "rejects", "split")
+
+    def __init__(self, start: int, end: int, elements: List[NetworkElement], rejects: List[Tuple[int, str, str]],
+                 split: int = 0):
+        self.start = start
+        self.end = end
+        self.elements = elements
+        self.rejects = rejects
+        """ ( byte offset, record, error ) of the records, that can't be imported """
+        self.split = split
+        """ amount of rejected records split by ImportAdapter.split_rejected, their lines can be wrong rejects """
+
+
+ELEMENT_FIELDS = ["name", "surname", "birthdate", "note", "phone_privat", "phone_work", "phone_secret",
+                  "email_privat", "email_work", "email_secret", "whatsup", "telegram", "signal", "hangouts"]
+""" fields of the imported contact and connection, targets of the column mappings """
+
+
+def element_of_values(values: Dict[str, str]) -> NetworkElement:
+    """ :param values: ELEMENT_FIELDS -> value, missing fields are empty """
+    name, surname, birthdate, note, *connection = [values.get(field) or "" for field in ELEMENT_FIELDS]
+    return NetworkElement(Contact(0, name, surname, birthdate, note), Connection(0, 0, *connection))
+
+
+class ImportAdapter(ABC):
+    """
+    format of the imported file for parse_file: split of the binary file to records and records -> elements,
+    instances are sent to the processes of the pool, they must be picklable,
+    subclass without read_records or parse_record can't be created
+    """
+    name = ""
+    has_header = False
+    """ first record is the header, it is passed to prepare and is not imported """
+
+    @abstractmethod
+    def read_records(self, file: BinaryIO) -> Iterator[bytes]:
+        """ raw records, concatenation of the records is the file ( byte offsets of the checkpoints ) """
+
+    def prepare(self, header: bytes):
+        """ state of parse_record from the header of the file, ValueError for not supported file """
+        return None
+
+    @abstractmethod
+    def parse_record(self, state, record: bytes) -> Union[NetworkElement, None]:
+        """ element of the record, None for empty record, ValueError or UnicodeDecodeError for broken record """
+
+    def split_rejected(self, record: bytes) -> Tuple[bytes, List[bytes]]:
+        """ broken beginning of the rejected record and records after it, that are parsed again """
+        return record, []
+
+    def parse_chunk(self, state, start: int, records: List[bytes]) -> ImportChunk:
+        """ worker of the process pool: records -> elements, broken records are rejected one by one """
+        from collections import deque
+        elements, rejects = [], []
+        split = 0
+        offset = start
+        records = deque(records)
+        while records:
+            record = records.popleft()
+            try:
+                element = self.parse_record(state, record)
+                if element is not None:
+                    elements.append(element)
+            except (UnicodeDecodeError, ValueError) as e:
+                record, others = self.split_rejected(record)
+                records.extendleft(reversed(others))
+                split += 1 if others else 0
+                rejects.append((offset, record.decode("utf-8", "replace"), f"{type(e).__name__}: {e}"))
+            offset += len(record)
+        return ImportChunk(start, offset, elements, rejects, split)
+
+
+def convert_date(value: str, date_format: str = None) -> str:
+    """ date of the file in date_format -> YYYY-MM-DD, empty for dates like '0/0/00', other values are not changed """
+    if not value or date_format is None:
+        return value
+    try:
+        return datetime.strptime(value.strip(), date_format).strftime("%Y-%m-%d")
+    except ValueError:
+        return "" if not value.strip("0/.- ") else value
+
+
+class CsvMappingAdapter(ImportAdapter):
+    """ csv file with header, fields of the element are taken from the columns by the mapping """
+    has_header = True
+
+    def __init__(self, name: str, mapping: Dict[str, List[str]], date_format: str = None, delimiter: str = ",",
+                 strict: bool = True, join_empty: bool = False):
+        """
+        :param mapping: ELEMENT_FIELDS -> columns of the header, not empty values of several columns are joined by space
+        :param date_format: strptime format of the birthdate in the file, None - the value is imported as is
+        :param strict: ValueError for the columns of the mapping missing in the file, otherwise they are empty
+        :param join_empty: empty values are joined too ( surname of Google CSV: given, additional and family name )
+        """
+        unknown = set(mapping) - set(ELEMENT_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown fields in the mapping: {', '.join(sorted(unknown))}, "
+                             f"fields: {', '.join(ELEMENT_FIELDS)}")
+        self.name = name
+        self.mapping = mapping
+        self.date_format = date_format
+        self.delimiter = delimiter
+        self.strict = strict
+        self.join_empty = join_empty
+
+    def read_records(self, file: BinaryIO) -> Iterator[bytes]:
+        return read_csv_records(file)
+
+    def split_rejected(self, record: bytes) -> Tuple[bytes, List[bytes]]:
+        """ several lines joined by a stray quote: only the first line is rejected """
+        import io
+        first, separator, rest = record.partition(b"\n")
+        if not rest:
+            return record, []
+        return first + separator, list(read_csv_records(io.BytesIO(rest)))
+
+    def prepare(self, header: bytes) -> Tuple[int, List[List[int]]]:
+        """
+        :return: amount of the columns, positions of the columns of ELEMENT_FIELDS,
+                 missing column has position 'amount of the columns' ( empty value appended to the row )
+        """
+        import csv
+        columns = next(csv.reader([header.decode("utf-8-sig")], delimiter=self.delimiter), [])
+        positions = google_column_positions(columns)
+        missing = [column for field_columns in self.mapping.values() for column in field_columns if column not in positions]
+        if missing and self.strict:
+            raise ValueError(f"columns of the mapping are missing in the file: {', '.join(missing)}")
+        return len(columns), [[positions.get(column, len(columns)) for column in self.mapping.get(field, [])]
+                              for field in ELEMENT_FIELDS]
+
+    def row_to_element(self, fields: List[List[int]], row: List[str]) -> NetworkElement:
+        row.append("")
+        values = []
+        for positions in fields:
+            if len(positions) == 1:
+                values.append(row[positions[0]])
+            else:
+                parts = [row[position] for position in positions]
+                values.append(" ".join(parts if self.join_empty else filter(None, parts)))
+        name, surname, birthdate, note, *connection = values
+        if self.date_format is not None:
+            birthdate = convert_date(birthdate, self.date_format)
+        return NetworkElement(Contact(0, name, surname, birthdate, note), Connection(0, 0, *connection))
+
+    def parse_record(self, state, record: bytes) -> Union[NetworkElement, None]:
+        import csv
+        import io
+        if not record.strip():
+            return None
+        columns, fields = state
+        try:
+            row = next(csv.reader(io.StringIO(record.decode("utf-8"), newline=""), delimiter=self.delimiter), [])
+        except csv.Error as e:
+            raise ValueError(f"csv: {e}")
+        if len(row) != columns:
+            raise ValueError(f"{len(row)} columns instead of {columns}")
+        return self.row_to_element(fields, row)
+
+    def parse_chunk(self, state, start: int, records: List[bytes]) -> ImportChunk:
+        """ whole chunk is parsed at once, record by record only when chunk has broken records """
+        import csv
+        import io
+        columns, fields = state
+        try:
+            rows = list(csv.reader(io.StringIO(b"".join(records).decode("utf-8"), newline=""), delimiter=self.delimiter))
+            if len(rows) == len(records) and all(len(row) == columns for row in rows):
+                return ImportChunk(start, start + sum(map(len, records)), [self.row_to_element(fields, row) for row in rows], [])
+        except (UnicodeDecodeError, csv.Error):
+            pass
+        return super().parse_chunk(state, start, records)
+
+
+GOOGLE_CSV_MAPPING = {"name": ["Name"], "surname": ["Given Name", "Additional Name", "Family Name"],
+                      "birthdate": ["Birthday"], "note": ["Notes"],
+                      "phone_privat": ["Phone 1 - Value"], "phone_work": ["Phone 2 - Value"], "phone_secret": ["Phone 3 - Value"],
+                      "email_privat": ["E-mail 1 - Value"], "email_work": ["E-mail 2 - Value"]}
+""" Google CSV export """
+OUTLOOK_CSV_MAPPING = {"name": ["First Name"], "surname": ["Middle Name", "Last Name"],
+                       "birthdate": ["Birthday"], "note": ["Notes"],
+                       "phone_privat": ["Mobile Phone"], "phone_work": ["Business Phone"], "phone_secret": ["Home Phone"],
+                       "email_privat": ["E-mail Address"], "email_work": ["E-mail 2 Address"],
+                       "email_secret": ["E-mail 3 Address"]}
+""" Outlook CSV export, birthday as M/D/YYYY, '0/0/00' - without birthday """
+
+
+def parse_mapping(text: str) -> Dict[str, List[str]]:
+    """ --mapping=name=First,surname=Middle+Last,phone_privat=Mobile -> {"name": ["First"], "surname": ["Middle", "Last"], ... } """
+    mapping = {}
+    for item in filter(None, (each.strip() for each in text.split(","))):
+        field, separator, columns = item.partition("=")
+        if not separator or not columns.strip():
+            raise ValueError(f"mapping item '{item}' is not field=column[+column]")
+        mapping[field.strip()] = [column.strip() for column in columns.split("+")]
+    if not mapping:
+        raise ValueError("mapping is empty")
+    return mapping
+
+
+VCARD_MESSENGERS = {"whatsapp": "whatsup", "telegram": "telegram", "signal": "signal", "hangouts": "hangouts",
+                    "gtalk": "hangouts"}
+""" IMPP and X-SOCIALPROFILE types or uri schemes -> messenger columns of connections """
+
+
+def vcard_birthdate(value: str) -> str:
+    """ BDAY of vCard 3.0/4.0 ( 1980-03-15, 19800315, --0315, 1980-03-15T00:00:00Z ) -> YYYY-MM-DD or --MM-DD """
+    value = value.strip().split("T")[0]
+    if len(value) == 8 and value.isdigit():
+        return f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    if len(value) == 6 and value.startswith("--") and value[2:].isdigit():
+        return f"--{value[2:4]}-{value[4:]}"
+    return value
+
+
+class VCardAdapter(ImportAdapter):
+    """ vCard 3.0/4.0 file ( .vcf ) with any amount of cards, export of the phones and CardDAV servers """
+    name = "vcard"
+
+    def read_records(self, file: BinaryIO) -> Iterator[bytes]:
+        return read_vcard_records(file)
+
+    def parse_record(self, state, record: bytes) -> Union[NetworkElement, None]:
+        if not record.strip():
+            return None
+        values: Dict[str, str] = {}
+        full_name = ""
+
+        def put(value: str, fields: List[str]) -> None:
+            """ value to the first empty field, the rest of the phones and emails is not imported """
+            for field in fields:
+                if not values.get(field):
+                    values[field] = value
+                    return
+
+        for name, parameters, value in parse_vcard(record.decode("utf-8")):
+            types = parameters.get("TYPE", [])
+            if name == "N":
+                family, given, additional = (split_unescaped(value, ";") + ["", "", ""])[:3]
+                values["name"] = unescape(given).strip()
+                values["surname"] = " ".join(part for part in (unescape(additional).strip(), unescape(family).strip()) if part)
+            elif name == "FN":
+                full_name = unescape(value).strip()
+            elif name == "TEL":
+                phone = unescape(value).strip()
+                phone = phone[4:] if phone.lower().startswith("tel:") else phone
+                if "work" in types:
+                    order = ["phone_work", "phone_privat", "phone_secret"]
+                elif not types or {"cell", "home", "pref", "voice"} & set(types):
+                    order = ["phone_privat", "phone_work", "phone_secret"]
+                else:
+                    order = ["phone_secret", "phone_privat", "phone_work"]
+                put(phone, order)
+            elif name == "EMAIL":
+                email = unescape(value).strip()
+                order = ["email_work", "email_privat", "email_secret"] if "work" in types else ["email_privat", "email_work", "email_secret"]
+                put(email, order)
+            elif name in ("IMPP", "X-SOCIALPROFILE"):
+                address = unescape(value).strip()
+                scheme = address.partition(":")[0].lower() if ":" in address else ""
+                for messenger in types + [scheme]:
+                    if messenger in VCARD_MESSENGERS:
+                        put(address, [VCARD_MESSENGERS[messenger]])
+                        break
+            elif name == "BDAY":
+                values["birthdate"] = vcard_birthdate(unescape(value))
+            elif name == "NOTE":
+                values["note"] = unescape(value)
+        if not values.get("name") and not values.get("surname"):
+            # vCard 4.0 requires FN only
+            values["name"], _, values["surname"] = full_name.partition(" ")
+        if not any(values.values()):
+            raise ValueError("card without name, phones and emails")
+        return element_of_values(values)
+
+
+GOOGLE_CSV = CsvMappingAdapter("google", GOOGLE_CSV_MAPPING, strict=False, join_empty=True)
+OUTLOOK_CSV = CsvMappingAdapter("outlook", OUTLOOK_CSV_MAPPING, date_format="%m/%d/%Y", strict=False)
+VCARD = VCardAdapter()
+IMPORT_ADAPTERS = {adapter.name: adapter for adapter in [GOOGLE_CSV, OUTLOOK_CSV, VCARD]}
+""" built-in formats of the import, 'csv' with user defined mapping - see csv_mapping_adapter """
+
+
+def csv_mapping_adapter(mapping: str, date_format: str = None, delimiter: str = ",") -> CsvMappingAdapter:
+    """ adapter of any csv file, see parse_mapping """
+    return CsvMappingAdapter("csv", parse_mapping(mapping), date_format, delimiter or ",")
+
+
+def detect_import_adapter(file_path: str) -> ImportAdapter:
+    """ vCard by the extension or the first line, Google or Outlook CSV by the header """
+    import csv
+    if os.path.splitext(file_path)[1].lower() in (".vcf", ".vcard"):
+        return VCARD
+    with open(file_path, "rb") as file:
+        header = next(read_csv_records(file), b"").decode("utf-8-sig", "replace")
+    if header.strip().upper() == "BEGIN:VCARD":
+        return VCARD
+    columns = set(next(csv.reader([header]), []))
+    if {"Given Name", "Family Name"} <= columns:
+        return GOOGLE_CSV
+    if {"First Name", "Last Name"} <= columns:
+        return OUTLOOK_CSV
+    raise ValueError(f"format of {file_path} is unknown, import it with --type=csv --mapping=name=<column>,...")
+
+
+def parse_file(file_path: str, adapter: ImportAdapter, start: int = 0, rows_per_chunk: int = IMPORT_BATCH_SIZE,
+               workers: int = 1) -> Iterator[ImportChunk]:
+    """
+    stream parsed chunks of the file in the order of the file
+    :param start: byte offset of the first record ( checkpoint ), 0 - after the header
+    :param workers: > 1 - chunks are parsed by the pool of processes, at most workers * IMPORT_QUEUE_CHUNKS_PER_WORKER
+                    chunks are in work ( reading waits for the writer )
+    """
+    with open(file_path, 'rb') as file:
+        header = b""
+        if adapter.has_header:
+            header = next(adapter.read_records(file), None)
+            if header is None:
+                return
+        state = adapter.prepare(header)
+        file.seek(max(start, len(header)))
+        chunks = read_chunks(adapter.read_records(file), file.tell(), rows_per_chunk)
+        if workers <= 1:
+            for offset, records in chunks:
+                yield adapter.parse_chunk(state, offset, records)
+            return
+
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(workers)
+        try:
+            pending = deque()
+            for offset, records in chunks:
+                pending.append(pool.submit(adapter.parse_chunk, state, offset, records))
+                if len(pending) >= workers * IMPORT_QUEUE_CHUNKS_PER_WORKER:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def next_contact_id(cursor: Cursor) -> int:
+    """ next free contacts.id, call it inside of the write transaction only """
+    row = cursor.execute("""SELECT max(coalesce((SELECT seq FROM sqlite_sequence WHERE name = 'contacts'), 0),
+                                   coalesce((SELECT max(id) FROM contacts), 0))""").fetchone()
+    return row[0] + 1
+
+
+def write_network_elements(conn: DBConnection, elements: List[NetworkElement],
+                           after_write: Callable[[Cursor], None] = None) -> int:
+    """
+    insert batch of elements with two executemany statements in one transaction,
+    ids of the contacts are reserved upfront, so connections can reference them without lastrowid
+    :param after_write: additional statements in the same transaction ( checkpoint of the import )
+    :return: amount of written elements
+    """
+    if not elements and after_write is None:
+        return 0
+    cursor = conn.cursor()
+    try:
+        conn.commit()
+        cursor.execute("BEGIN IMMEDIATE")
+        first_id = next_contact_id(cursor)
+        # updated_at of the rows is set here, the triggers of single inserts are skipped
+        now = adapt_datetime(datetime.now())
+        cursor.executemany("INSERT INTO contacts(id, name, surname, birthdate, note, deleted, updated_at) VALUES(?,?,?,?,?,?,?)",
+                           [(first_id + index, element.contact.name, element.contact.surname,
+                             element.contact.birthdate, element.contact.note, element.contact.deleted, now)
+                            for index, element in enumerate(elements)])
+        cursor.executemany("""INSERT INTO connections(id_contact,phone_privat,phone_work,phone_secret,email_privat,email_work,email_secret,whatsup,telegram,signal,hangouts, deleted, updated_at)
+                              VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                           [(first_id + index, element.connection.phone_privat, element.connection.phone_work,
+                             element.connection.phone_secret, element.connection.email_privat,
+                             element.connection.email_work, element.connection.email_secret,
+                             element.connection.whatsup, element.connection.telegram,
+                             element.connection.signal, element.connection.hangouts,
+                             element.connection.deleted, now)
+                            for index, element in enumerate(elements)])
+        cursor.executemany("INSERT OR IGNORE INTO identifiers(kind, identifier, id_contact) VALUES(?,?,?)",
+                           [(kind, identifier, first_id + index)
+                            for index, element in enumerate(elements) if not element.connection.deleted
+                            for kind, identifier in identifiers_of(element.connection)])
+        if after_write is not None:
+            after_write(cursor)
+        conn.commit()
+        return len(elements)
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def element_keys(element: NetworkElement) -> List[Tuple[str, str]]:
+    """ keys of the element for 'skip existing': normalized phones and emails, exact name and surname without them """
+    identifiers = identifiers_of(element.connection)
+    if identifiers:
+        return identifiers
+    return [("name", element.contact.name + "\t" + element.contact.surname)]
+
+
+def find_existing_keys(cursor: Cursor, keys: Set[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+    """ keys ( see element_keys ) of not deleted contacts, index probes of identifiers and idx_contacts_alive_name """
+    existing = set()
+    for kind in ("phone", "email"):
+        values = [value for each_kind, value in keys if each_kind == kind]
+        for start in range(0, len(values), SQL_MAX_IDS_IN_QUERY):
+            chunk = values[start:start + SQL_MAX_IDS_IN_QUERY]
+            cursor.execute(f"SELECT identifier FROM identifiers WHERE kind = ? AND identifier IN ({','.join('?' * len(chunk))})",
+                           [kind] + chunk)
+            existing.update((kind, row[0]) for row in cursor)
+    names = [value.split("\t", 1) for kind, value in keys if kind == "name"]
+    for start in range(0, len(names), SQL_MAX_IDS_IN_QUERY // 2):
+        chunk = names[start:start + SQL_MAX_IDS_IN_QUERY // 2]
+        cursor.execute(f"""SELECT name, surname FROM contacts 
+                           WHERE deleted = 0 AND (name, surname) IN (VALUES {','.join('(?,?)' for _ in chunk)})""",
+                       [value for name in chunk for value in name])
+        existing.update(("name", row[0] + "\t" + row[1]) for row in cursor)
+    return existing
+
+
+def skip_existing_elements(conn: DBConnection, elements: List[NetworkElement], seen: Set[Tuple[str, str]]) -> List[NetworkElement]:
+    """
+    elements without keys ( see element_keys ) in the Database or in already imported part of the file
+    :param seen: keys of the previous batches of the import, updated
+    """
+    keys_of_elements = [element_keys(element) for element in elements]
+    cursor = conn.cursor()
+    try:
+        existing = find_existing_keys(cursor, {key for keys in keys_of_elements for key in keys} - seen)
+    finally:
+        cursor.close()
+    new_elements = []
+    for element, keys in zip(elements, keys_of_elements):
+        if any(key in existing or key in seen for key in keys):
+            continue
+        seen.update(keys)
+        new_elements.append(element)
+    return new_elements
+
+
+def print_import_progress(imported: int, started: float, skipped: int = 0, rejected: int = 0) -> None:
+    elapsed = time.monotonic() - started
+    rate = (imported + skipped + rejected) / elapsed if elapsed > 0 else 0
+    print(f"imported: {imported} rows{f', skipped existing: {skipped}' if skipped else ''}"
+          f"{f', rejected: {rejected}' if rejected else ''}, {rate:.0f} rows/sec", file=sys.stderr)
+
+
+def import_google_contacts(conn: DBConnection, file_path: str, batch_size: int = IMPORT_BATCH_SIZE,
+                           verbose: bool = True, skip_existing: bool = False, workers: int = 1,
+                           restart: bool = False) -> int:
+    return import_file(conn, file_path, GOOGLE_CSV, batch_size, verbose, skip_existing, workers, restart)
+
+
+def import_file(conn: DBConnection, file_path: str, adapter: ImportAdapter, batch_size: int = IMPORT_BATCH_SIZE,
+                verbose: bool = True, skip_existing: bool = False, workers: int = 1, restart: bool = False) -> int:
+    """
+    import in transactions of batch_size records, every transaction saves the checkpoint ( imports.byte_offset ):
+    next import of the same file ( sha256 ) continues after the checkpoint, finished file is not imported again,
+    broken records ( csv, vCard, amount of columns, not utf-8 ) are saved to import_rejects instead of stopping the import,
+    import with split rejected records ( ImportAdapter.split_rejected ) is not marked finished
+    :param adapter: format of the file, see IMPORT_ADAPTERS and detect_import_adapter
+    :param workers: processes for parsing of the file, 1 - parsing in the writer process
+    :param restart: import the file from the beginning, also if it was imported before
+    :return: amount of imported contacts
+    """
+    file_id = file_hash(file_path)
+    if file_id is None:
+        raise FileNotFoundError(file_path)
+    checkpoint = conn.execute("SELECT byte_offset, finished FROM imports WHERE file_hash = ?", (file_id,)).fetchone()
+    if checkpoint is not None and not restart:
+        if checkpoint[1] is not None:
+            if verbose:
+                print(f"file {file_path} was imported already, restart the import with --restart", file=sys.stderr)
+            return 0
+        start = checkpoint[0]
+        if verbose:
+            print(f"continue import of {file_path} from byte {start}", file=sys.stderr)
+    else:
+        start = 0
+        conn.execute("INSERT OR REPLACE INTO imports(file_hash, file_path, started) VALUES(?, ?, ?)",
+                     (file_id, file_path, int(time.time())))
+        conn.execute("DELETE FROM import_rejects WHERE file_hash = ?", (file_id,))
+        conn.commit()
+
+    started = time.monotonic()
+    imported, skipped, rejected = 0, 0, 0
+    split = 0
+    seen: Set[Tuple[str, str]] = set()
+    for chunk in parse_file(file_path, adapter, start, batch_size, workers):
+        elements = skip_existing_elements(conn, chunk.elements, seen) if skip_existing else chunk.elements
+
+        def save_checkpoint(cursor: Cursor) -> None:
+            cursor.executemany("INSERT INTO import_rejects(file_hash, byte_offset, record, error) VALUES(?, ?, ?, ?)",
+                               [(file_id, offset, record, error) for offset, record, error in chunk.rejects])
+            cursor.execute("""UPDATE imports SET byte_offset = ?, imported = imported + ?, skipped = skipped + ?,
+                                                 rejected = rejected + ? WHERE file_hash = ?""",
+                           (chunk.end, len(elements), len(chunk.elements) - len(elements), len(chunk.rejects), file_id))
+
+        imported += write_network_elements(conn, elements, save_checkpoint)
+        skipped += len(chunk.elements) - len(elements)
+        rejected += len(chunk.rejects)
+        split += chunk.split
+        if verbose:
+            print_import_progress(imported, started, skipped, rejected)
+    if split:
+        # lines of a split record are rejected one by one, also lines of a valid multi-line value
+        print(f"{split} rejected records of {file_path} had several lines and were split, "
+              f"the import is not marked finished", file=sys.stderr)
+    else:
+        conn.execute("UPDATE imports SET finished = ? WHERE file_hash = ?", (int(time.time()), file_id))
+        conn.commit()
+    if verbose and rejected:
+        print(f"rejected records: SELECT byte_offset, error, record FROM import_rejects WHERE file_hash = '{file_id}'",
+              file=sys.stderr)
+    return imported
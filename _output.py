@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+from itertools import islice
+from typing import Iterable, List
+
+from _common import get_option
+
+OUTPUT_FORMATS = ["table", "tsv", "jsonl"]
+""" --format: rich table for terminal, TSV ( default when stdout is not a terminal ) or JSON lines """
+TABLE_CHUNK_ROWS = 200
+""" rows of one rendered rich table, printing starts after the first chunk instead of after the whole list """
+
+
+def output_format() -> str:
+    value = get_option("--format")
+    if value in OUTPUT_FORMATS:
+        return value
+    return "table" if sys.stdout.isatty() else "tsv"
+
+
+def tsv_value(value) -> str:
+    """ one line per row: tabs and line breaks inside the value are escaped """
+    if value is None:
+        return ""
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def print_table(columns: List[str], rows: Iterable[tuple]) -> int:
+    """
+    stream rows to stdout, rows ( generator over cursor ) are consumed one by one or by TABLE_CHUNK_ROWS
+    :param rows: values in the order of columns
+    :return: amount of printed rows
+    """
+    rows = iter(rows)
+    count = 0
+    try:
+        if output_format() == "tsv":
+            sys.stdout.write("\t".join(columns) + "\n")
+            for row in rows:
+                sys.stdout.write("\t".join(map(tsv_value, row)) + "\n")
+                count += 1
+        elif output_format() == "jsonl":
+            for row in rows:
+                sys.stdout.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n")
+                count += 1
+        else:
+            from rich.console import Console
+            from rich.table import Table
+            console = Console()
+            while True:
+                chunk = list(islice(rows, TABLE_CHUNK_ROWS))
+                if not chunk:
+                    break
+                table = Table(show_header=(count == 0), header_style="bold green")
+                for column in columns:
+                    table.add_column(column)
+                for row in chunk:
+                    table.add_row(*("" if value is None else str(value) for value in row))
+                try:
+                    console.print(table)
+                except SystemExit:
+                    # broken pipe in rich: stdout is redirected to devnull already
+                    break
+                count += len(chunk)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # reader is closed ( head, less ): stop quietly, without error on flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        # not consumed generator releases its cursors now, not after the connection is closed
+        if hasattr(rows, "close"):
+            rows.close()
+    return count
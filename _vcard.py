@@ -0,0 +1,117 @@
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+VCARD_LINE_LENGTH = 75
+""" maximal length of the line in octets ( RFC 6350 ), longer lines are folded """
+
+
+def read_vcard_records(file: BinaryIO) -> Iterator[bytes]:
+    """
+    raw 'BEGIN:VCARD' ... 'END:VCARD' records of the binary file, lines between the cards belong to the next record:
+    concatenation of the records is the file, byte offsets of the records are offsets in the file
+    """
+    record = []
+    inside = False
+    for line in file:
+        record.append(line)
+        stripped = line.strip().upper()
+        if not inside:
+            # utf-8 BOM before the first card
+            inside = stripped.endswith(b"BEGIN:VCARD")
+        elif stripped == b"END:VCARD":
+            yield b"".join(record)
+            record = []
+            inside = False
+    if record:
+        # lines after the last card or not finished card, parse_vcard rejects it
+        yield b"".join(record)
+
+
+def unescape(value: str) -> str:
+    result = []
+    escaped = False
+    for symbol in value:
+        if escaped:
+            result.append("\n" if symbol in "nN" else symbol)
+            escaped = False
+        elif symbol == "\\":
+            escaped = True
+        else:
+            result.append(symbol)
+    return "".join(result)
+
+
+def split_unescaped(value: str, separator: str) -> List[str]:
+    """ split of the structured value ( N: family;given;... ) by not escaped separator """
+    parts, start, escaped = [], 0, False
+    for position, symbol in enumerate(value):
+        if escaped:
+            escaped = False
+        elif symbol == "\\":
+            escaped = True
+        elif symbol == separator:
+            parts.append(value[start:position])
+            start = position + 1
+    parts.append(value[start:])
+    return parts
+
+
+def parse_vcard(text: str) -> List[Tuple[str, Dict[str, List[str]], str]]:
+    """
+    properties of vCard 3.0 / 4.0 in the order of the record
+    :return: list of ( name in upper case, parameters: upper case name -> lower case values, raw value )
+    """
+    lines = []
+    for line in text.lstrip("\ufeff").splitlines():
+        if not lines and line.strip().upper() != "BEGIN:VCARD":
+            # empty lines and other text before the card
+            continue
+        if line[:1] in (" ", "\t") and lines:
+            # folded line
+            lines[-1] += line[1:]
+        elif line.strip():
+            lines.append(line)
+    if not lines or lines[0].strip().upper() != "BEGIN:VCARD" or lines[-1].strip().upper() != "END:VCARD":
+        raise ValueError("record is not enclosed in BEGIN:VCARD ... END:VCARD")
+
+    properties = []
+    for line in lines[1:-1]:
+        name_and_parameters, separator, value = line.partition(":")
+        if not separator:
+            raise ValueError(f"line without value: {line[:40]}")
+        name, *raw_parameters = name_and_parameters.split(";")
+        # group prefix 'item1.TEL' of Apple exports
+        name = name.rpartition(".")[2].upper()
+        parameters: Dict[str, List[str]] = {}
+        for raw_parameter in raw_parameters:
+            key, has_value, parameter_value = raw_parameter.partition("=")
+            if not has_value:
+                # vCard 2.1/3.0 short form 'TEL;CELL:...'
+                key, parameter_value = "TYPE", key
+            values = [each.strip('"').lower() for each in parameter_value.split(",")]
+            parameters.setdefault(key.upper(), []).extend(values)
+        properties.append((name, parameters, value))
+    return properties
+
+
+def escape(value: str) -> str:
+    return (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n") \
+        .replace("\n", "\\n")
+
+
+def fold(line: str) -> str:
+    """ content line folded by VCARD_LINE_LENGTH octets, without splitting of utf-8 sequences """
+    encoded = line.encode("utf-8")
+    if len(encoded) <= VCARD_LINE_LENGTH:
+        return line + "\r\n"
+    parts = []
+    part = ""
+    size = 0
+    for symbol in line:
+        length = len(symbol.encode("utf-8"))
+        if size + length > (VCARD_LINE_LENGTH if not parts else VCARD_LINE_LENGTH - 1):
+            parts.append(part)
+            part, size = "", 0
+        part += symbol
+        size += length
+    parts.append(part)
+    return "\r\n ".join(parts) + "\r\n"
@@ -0,0 +1,240 @@
+import csv
+import importlib.util
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from _common import create_connection, Contact, Connection, NetworkElement, Status, get_option, get_int_option, \
+    get_contacts_by_name_and_surname, get_contacts_without_birthdays, get_network_elements, search_everything, \
+    lookup_contact_ids
+from _importer import google_contact_columns, write_network_elements, import_google_contacts
+from _dedup import find_duplicates
+from _export import export_network
+
+BENCHMARK_SIZES = [1000, 100000, 1000000]
+""" amount of contacts in generated databases """
+BENCHMARK_SEED = 42
+MEETINGS_YEARS = 3
+""" history of the meetings for every contact """
+CSV_IMPORT_MAX_ROWS = 100000
+""" Google CSV import is measured on min(size, CSV_IMPORT_MAX_ROWS) rows """
+
+NAMES = ["Anna", "Andreas", "Bernd", "Claudia", "Daniel", "Elena", "Frank", "Gabriele", "Hans", "Ines", "Jan",
+         "Katrin", "Lukas", "Maria", "Nina", "Oliver", "Petra", "Ralf", "Sabine", "Thomas", "Ute", "Vitalii",
+         "Wolfgang", "Yana", "Zoe"]
+SURNAMES = ["Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz", "Hoffmann", "Koch",
+            "Richter", "Klein", "Wolf", "Neumann", "Schwarz", "Zimmermann", "Braun", "Hofmann", "Hartmann", "Lange"]
+WORDS = ["coffee", "project", "kubernetes", "birthday", "conference", "call", "lunch", "python", "family", "trip",
+         "review", "interview", "football", "book", "concert"]
+
+
+def load_script(name: str, file_name: str):
+    """ entry points have '-' in the name, they can't be imported with 'import' """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+contacts_manager = load_script("contacts_manager", "contacts-manager.py")
+meetings_manager = load_script("meetings_manager", "meetings-manager.py")
+birthday_reminder = load_script("birthday_reminder", "birthday-reminder.py")
+
+
+def random_phone(generator: random.Random) -> str:
+    return generator.choice(["+49 ", "0", "+380 ", ""]) + str(generator.randint(150, 179)) + " " + \
+        str(generator.randint(1000000, 9999999))
+
+
+def random_network_element(generator: random.Random, index: int) -> NetworkElement:
+    name = generator.choice(NAMES)
+    surname = generator.choice(SURNAMES) + str(index)
+    birthdate = ""
+    if generator.random() < 0.8:
+        birthdate = (datetime(1950, 1, 1) + timedelta(days=generator.randint(0, 20000))).strftime('%Y-%m-%d')
+    note = " ".join(generator.sample(WORDS, 2)) if generator.random() < 0.3 else ""
+    email = f"{name}.{surname}@example.com".lower()
+    return NetworkElement(Contact(0, name, surname, birthdate, note),
+                          Connection(0, 0, random_phone(generator), random_phone(generator) if generator.random() < 0.3 else "",
+                                     "", email, "", "", "", "", "", ""))
+
+
+def random_meetings(generator: random.Random, id_contact: int, now: datetime) -> List[Tuple]:
+    """ history of the meetings of the contact ( done, cancelled ) and sometimes next open meeting """
+    meetings = []
+    for _ in range(generator.randint(0, MEETINGS_YEARS * 2)):
+        date = now - timedelta(days=generator.randint(1, MEETINGS_YEARS * 365), hours=generator.randint(0, 23))
+        status = generator.choice([Status.DONE, Status.DONE, Status.CANCELLED, Status.CALLEDBACK])
+        meetings.append((id_contact, date, status.value, generator.choice(WORDS)))
+    if generator.random() < 0.4:
+        date = now + timedelta(days=generator.randint(-10, 60))
+        meetings.append((id_contact, date, generator.choice([Status.TODO, Status.ASKED]).value, generator.choice(WORDS)))
+    return meetings
+
+
+def generate_database(path: str, size: int, seed: int = BENCHMARK_SEED) -> None:
+    """ database with the schema of the applications ( init_database, db_init_database ) and random data """
+    generator = random.Random(seed)
+    now = datetime.now()
+    connection = create_connection(path)
+    try:
+        contacts_manager.init_database(connection)
+        meetings_manager.db_init_database(connection)
+        batch_size = 10000
+        for start in range(0, size, batch_size):
+            elements = [random_network_element(generator, index) for index in range(start, min(size, start + batch_size))]
+            write_network_elements(connection, elements)
+        first_id = connection.execute("SELECT min(id) FROM contacts").fetchone()[0]
+        for start in range(0, size, batch_size):
+            meetings = [meeting for id_contact in range(first_id + start, first_id + min(size, start + batch_size))
+                        for meeting in random_meetings(generator, id_contact, now)]
+            connection.executemany("INSERT INTO meetings (id_contact, date, status, notes) VALUES (?, ?, ?, ?)", meetings)
+            connection.commit()
+        connection.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def generate_google_csv(path: str, size: int, seed: int = BENCHMARK_SEED) -> None:
+    generator = random.Random(seed)
+    positions = {column: position for position, column in enumerate(google_contact_columns)}
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(google_contact_columns)
+        for index in range(size):
+            element = random_network_element(generator, index)
+            row = [""] * len(google_contact_columns)
+            row[positions["Name"]] = element.contact.name + " " + element.contact.surname
+            row[positions["Given Name"]] = element.contact.name
+            row[positions["Family Name"]] = element.contact.surname
+            row[positions["Birthday"]] = element.contact.birthdate
+            row[positions["Notes"]] = element.contact.note
+            row[positions["Phone 1 - Value"]] = element.connection.phone_privat
+            row[positions["Phone 2 - Value"]] = element.connection.phone_work
+            row[positions["E-mail 1 - Value"]] = element.connection.email_privat
+            writer.writerow(row)
+
+
+def measure(function: Callable, repeat: int) -> Dict:
+    """ one warm-up call, then 'repeat' calls: min and median of the wall time, size of the result """
+    result = function()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    rows = len(result) if hasattr(result, "__len__") else result
+    return {"min_ms": round(min(timings) * 1000, 3), "median_ms": round(statistics.median(timings) * 1000, 3), "rows": rows}
+
+
+def query_benchmarks(connection: sqlite3.Connection, devnull) -> Dict[str, Callable]:
+    """ :param devnull: text file for the output of the export """
+    now = datetime.now()
+    return {
+        "get_contacts_by_name_and_surname": lambda: get_contacts_by_name_and_surname(connection, "an", "schm"),
+        "get_contacts_without_birthdays": lambda: get_contacts_without_birthdays(connection),
+        "get_network_elements": lambda: get_network_elements(
+            connection, [contact.id for contact in get_contacts_by_name_and_surname(connection, "Anna", "Weber1")]),
+        "find_upcoming_meetings": lambda: meetings_manager.find_upcoming_meetings(connection, now) or [],
+        "find_contacts_without_meetings": lambda: meetings_manager.find_contacts_without_meetings(connection),
+        "find_contacts_without_meetings_by_last_meeting": lambda: meetings_manager.find_contacts_without_meetings(
+            connection, order_by_last_meeting=True),
+        "get_recent_and_upcoming_birthdays": lambda: birthday_reminder.get_recent_and_upcoming_birthdays(connection, 30),
+        "search_everything": lambda: search_everything(connection, "kube anna"),
+        "lookup_contact_ids": lambda: lookup_contact_ids(connection, "anna.schmidt1@example.com"),
+        "find_duplicates": lambda: find_duplicates(connection),
+        "export_network": lambda: export_network(connection, devnull, "csv"),
+    }
+
+
+def run_benchmarks(sizes: List[int], repeat: int, directory: str) -> List[Dict]:
+    results = []
+    for size in sizes:
+        path = os.path.join(directory, f"benchmark-{size}-{BENCHMARK_SEED}.db")
+        if not os.path.exists(path):
+            print(f"generating {path}", file=sys.stderr)
+            started = time.perf_counter()
+            generate_database(path, size)
+            print(f"generated in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+        connection = create_connection(path)
+        try:
+            # existing database from previous run gets migrations of the current code
+            contacts_manager.init_database(connection)
+            meetings_manager.db_init_database(connection)
+            with open(os.devnull, "w") as devnull:
+                for name, function in query_benchmarks(connection, devnull).items():
+                    results.append(dict(benchmark=name, size=size, **measure(function, repeat)))
+                    print(json.dumps(results[-1]), file=sys.stderr)
+        finally:
+            connection.close()
+
+        import_size = min(size, CSV_IMPORT_MAX_ROWS)
+        csv_path = os.path.join(directory, f"benchmark-google-{import_size}-{BENCHMARK_SEED}.csv")
+        if not os.path.exists(csv_path):
+            generate_google_csv(csv_path, import_size)
+        with tempfile.TemporaryDirectory() as import_directory:
+            connection = create_connection(os.path.join(import_directory, "import.db"))
+            try:
+                contacts_manager.init_database(connection)
+                started = time.perf_counter()
+                imported = import_google_contacts(connection, csv_path, verbose=False)
+                elapsed = time.perf_counter() - started
+            finally:
+                connection.close()
+        results.append({"benchmark": "import_google_contacts", "size": import_size, "min_ms": round(elapsed * 1000, 3),
+                        "median_ms": round(elapsed * 1000, 3), "rows": imported})
+        print(json.dumps(results[-1]), file=sys.stderr)
+    return results
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def save_results(path: str, results: List[Dict]) -> None:
+    """ one json object per line, with commit and versions - files of different commits can be compared """
+    environment = {"commit": current_commit(), "timestamp": datetime.now().isoformat(timespec="seconds"),
+                   "python": sys.version.split()[0], "sqlite": sqlite3.sqlite_version}
+    with open(path, "w") as file:
+        for result in results:
+            file.write(json.dumps({**environment, **result}) + "\n")
+
+
+def print_comparison(previous_path: str, results: List[Dict]) -> None:
+    with open(previous_path) as file:
+        previous = {(each["benchmark"], each["size"]): each for each in map(json.loads, file) if each}
+    print(f"{'benchmark':<48} {'size':>8} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for result in results:
+        before = previous.get((result["benchmark"], result["size"]))
+        if before is None:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        print(f"{result['benchmark']:<48} {result['size']:>8} {before['median_ms']:>10.1f} {result['median_ms']:>10.1f} {ratio:>7.2f}")
+
+
+if __name__ == '__main__':
+    # python3 benchmark.py --sizes=1000,100000 --repeat=5 --dir=/tmp --output=results.jsonl --compare=previous.jsonl
+    sizes = [int(size) for size in get_option("--sizes", ",".join(map(str, BENCHMARK_SIZES))).split(",")]
+    directory = get_option("--dir", tempfile.gettempdir())
+    results = run_benchmarks(sizes, get_int_option("--repeat", 5), directory)
+    output = get_option("--output")
+    if output:
+        save_results(output, results)
+    else:
+        for result in results:
+            print(json.dumps(result))
+    if get_option("--compare"):
+        print_comparison(get_option("--compare"), results)
@@ -1,58 +1,93 @@
 import sys
+import calendar
 import datetime
-from _common import create_table, create_connection, Connection, NetworkElement, Contact, DB_DEFAULT_PATH, get_contacts_by_name_and_surname
+from _common import DB_DEFAULT_PATH, get_arguments, open_database, get_columns, BIRTHDAY_KEY_SQL, report_startup_profile
 from sqlite3 import Connection as DBConnection
-from typing import List
+from typing import List, Dict
+
+def birthday_window(today: datetime.date, days_range: int) -> Dict[int, List[int]]:
+    """
+    month-day keys ( MMDD ) of all the days in the range of +-days_range around today
+    :return: map birth_md -> list of days_from_today
+    """
+    window: Dict[int, List[int]] = {}
+    for delta in range(-days_range, days_range + 1):
+        target_date = today + datetime.timedelta(days=delta)
+        window.setdefault(target_date.month * 100 + target_date.day, []).append(delta)
+        # 29th of February is celebrated on 28th in non-leap years
+        if target_date.month == 2 and target_date.day == 28 and not calendar.isleap(target_date.year):
+            window.setdefault(229, []).append(delta)
+    return window
+
 
 def get_recent_and_upcoming_birthdays(connection: DBConnection, days_range=5):    
     """
     get from DBConnection.contacts table all the birthdays in the range of +-days_range
+    with one range query over the index of contacts.birth_md ( also when the range crosses New Year )
     """
     today = datetime.date.today()
-    results = []
+    window: Dict[int, List[int]] = birthday_window(today, days_range)
 
-    for delta in range(-days_range, days_range + 1):
-        target_date = today + datetime.timedelta(days=delta)
-        # We only care about month and day, not year
-        month = target_date.month
-        day = target_date.day
+    first_day = today - datetime.timedelta(days=days_range)
+    last_day = today + datetime.timedelta(days=days_range)
+    first_key = first_day.month * 100 + first_day.day
+    last_key = last_day.month * 100 + last_day.day
+    if last_key == 228 and not calendar.isleap(last_day.year):
+        last_key = 229
+
+    results = []
+    cursor = connection.cursor()
+    try:
+        # read-only connection to not migrated database: the same key, but computed for every row
+        birth_md = "birth_md" if "birth_md" in get_columns(cursor, "contacts") else BIRTHDAY_KEY_SQL.format(birthdate="birthdate")
+        if days_range * 2 + 1 >= 366:
+            condition, params = f"{birth_md} IS NOT NULL", ()
+        elif first_key <= last_key:
+            condition, params = f"{birth_md} BETWEEN ? AND ?", (first_key, last_key)
+        else:
+            # range crosses New Year
+            condition, params = f"({birth_md} >= ? OR {birth_md} <= ?)", (first_key, last_key)
 
-        query = """
-            SELECT * FROM contacts WHERE strftime('%m-%d', birthdate) = ? AND deleted IS NOT TRUE
+        query = f"""
+            SELECT id, name, surname, birthdate, note, deleted, {birth_md} FROM contacts WHERE {condition} AND deleted IS NOT TRUE
         """
-        cursor = connection.cursor()
-        try:
-            cursor.execute(query, (f"{month:02d}-{day:02d}",))
-            contacts = cursor.fetchall()
-            for contact in contacts:
+        cursor.execute(query, params)
+        for row in cursor:
+            for delta in window.get(row[6], []):
                 results.append({
-                    "contact": contact,
+                    "contact": row[:6],
                     "days_from_today": delta
                 })
-        except Exception as e:
-            print(f"DB path is not right ")
-            return []
-        finally:
-            cursor.close()
+    except Exception as e:
+        print(f"DB path is not right ")
+        return []
+    finally:
+        cursor.close()
+    results.sort(key=lambda entry: entry["days_from_today"])
     return results
 
 # Example usage:
 if __name__ == '__main__':
     
+    arguments: List[str] = get_arguments()
     database_path = DB_DEFAULT_PATH
-    if len(sys.argv) > 1:
-        database_path: str = sys.argv[1]
+    if len(arguments) > 1:
+        database_path: str = arguments[1]
 
     default_amount_of_days:int = 5
-    if len(sys.argv) > 2:
-        default_amount_of_days = int(sys.argv[2])
+    if len(arguments) > 2:
+        default_amount_of_days = int(arguments[2])
 
     edit: List[str] = [each_argument for each_argument in sys.argv[1:] if each_argument=='mark_complete']
     if len(edit)>0:
         print("need to complete")
 
     db_connection: DBConnection
-    with create_connection(database_path) as db_connection:
+    with open_database(database_path, read_only=True) as db_connection:
+        if db_connection is None:
+            print(f"DB path is not right ")
+            sys.exit(1)
+        report_startup_profile()
         birthdays = get_recent_and_upcoming_birthdays(db_connection, default_amount_of_days)
         for entry in birthdays:
             contact = entry["contact"]
@@ -1,17 +1,19 @@
-import csv
-import re
+import os
 import sys
 from datetime import datetime
-from typing import List, Union
+from typing import Iterable, Iterator, List, Union, Tuple
 
-from questionary import ValidationError
-from questionary import Validator
-from questionary import prompt, Separator, unsafe_prompt
-from rich import print as print_rich
-from rich.console import Console
-from rich.table import Table
-
-from _common import create_table, create_connection, Connection, NetworkElement, Contact, DB_DEFAULT_PATH, get_contacts_by_name_and_surname, get_contacts_without_birthdays
+from _common import create_table, Connection, NetworkElement, Contact, DB_DEFAULT_PATH, iter_contacts_by_name_and_surname, iter_contacts_without_birthdays, \
+    migrate_database, SQL_CREATE_CONTACTS, SQL_CREATE_CONNECTIONS, get_network_elements, iter_network_elements, get_int_option, get_option, \
+    search_everything, save_identifiers, lookup_contact_ids, get_arguments, \
+    open_database, checkpoint_working_copy, report_startup_profile, get_cached_network_element, IDENTITY_CACHE
+from _importer import import_google_contacts, IMPORT_BATCH_SIZE, IMPORT_ADAPTERS, ImportAdapter, import_file, \
+    detect_import_adapter, csv_mapping_adapter
+from _output import print_table
+from _export import EXPORT_FORMATS, export_network, parse_since
+from _changes import CHANGE_COLUMNS, Change, ChangesPruned, iter_changes, last_change_seq, prune_changes
+from _dedup import DuplicateGroup, find_duplicates, choose_kept_contact, merge_contacts, merge_duplicates, DEDUP_KEYS, \
+    DEDUP_STRONG_KEYS
 
 
 def datetime_to_string(dt: datetime) -> str:
@@ -36,30 +38,21 @@ def create_network_element(conn, network_element: NetworkElement) -> int:
                           network_element.connection.whatsup, network_element.connection.telegram,
                           network_element.connection.signal, network_element.connection.hangouts,
                           network_element.connection.deleted))
-        return cur.lastrowid
+        connection_id = cur.lastrowid
+        save_identifiers(cur, contact_id, network_element.connection)
+        return connection_id
     finally:
         cur.close()
         conn.commit()
 
 
 def get_network_element(conn: Connection, id: int) -> Union[NetworkElement, None]:
+    """ :param id: contacts.id, also as text from input """
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM contacts WHERE id=?", (id,))
-
-        row = cur.fetchone()
-        if row is None:
-            return None
-        contact = Contact(row[0], row[1], row[2], row[3], row[4], row[5])
-
-        cur.execute("SELECT * FROM connections WHERE id_contact=?", (id,))
-        row = cur.fetchone()
-        connection = Connection(row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9], row[10],
-                                row[11], row[12])
-
-        return NetworkElement(contact, connection)
-    finally:
-        cur.close()
+        id = int(id)
+    except ValueError:
+        return None
+    return get_cached_network_element(conn, id)
 
 
 def update_network_element(conn, network_element):
@@ -108,9 +101,11 @@ def update_network_element(conn, network_element):
                      network_element.connection.hangouts,
                      network_element.connection.deleted,
                      network_element.contact.id))
+        save_identifiers(cur, network_element.contact.id, network_element.connection)
     finally:
         cur.close()
         conn.commit()
+        IDENTITY_CACHE.invalidate("element", int(network_element.contact.id))
 
 
 def delete_network_element(conn: Connection, id: int):
@@ -121,71 +116,45 @@ def delete_network_element(conn: Connection, id: int):
             element.contact.deleted = True
             element.connection.deleted = True
             update_network_element(conn, element)
+            IDENTITY_CACHE.invalidate("element", element.contact.id)
     finally:
         cur.close()
         conn.commit()
 
 
 def init_database(connection: Connection) -> bool:
-    # DATE - text in format 'YYYY-MM-DD'
-    sql_create_contacts_table = """ CREATE TABLE IF NOT EXISTS contacts (
-                                        id integer PRIMARY KEY AUTOINCREMENT,
-                                        name text NOT NULL,
-                                        surname text NOT NULL,
-                                        birthdate DATE,
-                                        note text, 
-                                        deleted boolean DEFAULT FALSE
-                                    ); """
-
-    sql_create_connections_table = """CREATE TABLE IF NOT EXISTS connections (
-                                    id integer PRIMARY KEY AUTOINCREMENT,
-                                    id_contact integer NOT NULL,
-                                    phone_privat text,
-                                    phone_work text,
-                                    phone_secret text,
-                                    email_privat text,
-                                    email_work text,
-                                    email_secret text,
-                                    whatsup text,
-                                    telegram text,
-                                    signal text,
-                                    hangouts text,
-                                    deleted boolean DEFAULT FALSE, 
-                                    FOREIGN KEY (id_contact) REFERENCES contacts (id)
-                                );"""
     if connection is not None:
-        create_table(connection, sql_create_contacts_table)
-        create_table(connection, sql_create_connections_table)
-        return True
+        create_table(connection, SQL_CREATE_CONTACTS)
+        create_table(connection, SQL_CREATE_CONNECTIONS)
+        return migrate_database(connection)
     else:
         print("Error! cannot create the database connection.")
         return False
 
 
-class DateValidator(Validator):
-    def validate(self, document):
-        try:
-            datetime.strptime(document.text, '%Y-%m-%d')
-        except ValueError:
-            raise ValidationError( message='Please enter a date in YYYY-MM-DD format', cursor_position=len(document.text) )
+def validate_date(text: str) -> Union[bool, str]:
+    """ questionary validator: True or error message """
+    try:
+        datetime.strptime(text, '%Y-%m-%d')
+        return True
+    except ValueError:
+        return 'Please enter a date in YYYY-MM-DD format'
 
 
-class EmailValidator(Validator):
-    def validate(self, document):
-        if not document.text or len(document.text)==0:
-            return
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", document.text):
-            raise ValidationError(
-                message='Please enter a valid email address',
-                cursor_position=len(document.text))
+def validate_email(text: str) -> Union[bool, str]:
+    import re
+    if not text or len(text)==0:
+        return True
+    if not re.match(r"[^@]+@[^@]+\.[^@]+", text):
+        return 'Please enter a valid email address'
+    return True
 
 
-class PhoneValidator(Validator):
-    def validate(self, document):
-        if not re.match(r"(\+)?\d{4,}", document.text):
-            raise ValidationError(
-                message='Please enter a valid phone number',
-                cursor_position=len(document.text))
+def validate_phone(text: str) -> Union[bool, str]:
+    import re
+    if not re.match(r"(\+)?\d{4,}", text):
+        return 'Please enter a valid phone number'
+    return True
 
 
 def check_date_format_or_none(date: str) -> bool:
@@ -215,7 +184,7 @@ def prompt_network_element(element: NetworkElement = None) -> Union[NetworkEleme
             'type': 'input',
             'name': 'birthdate',
             'message': 'Enter the contact\'s birthdate (YYYY-MM-DD):',
-            'validate': DateValidator,
+            'validate': validate_date,
             'default': element.contact.birthdate if element and element.contact else ''
         }
 
@@ -258,7 +227,7 @@ def prompt_network_element(element: NetworkElement = None) -> Union[NetworkEleme
             'type': 'input',
             'name': 'email_privat',
             'message': 'Enter the private email:',
-            'validate': EmailValidator,
+            'validate': validate_email,
             'default': element.connection.email_privat if element else '',
         },
         {
@@ -270,6 +239,7 @@ def prompt_network_element(element: NetworkElement = None) -> Union[NetworkEleme
         # Add more questions for the remaining fields
     ]
 
+    from questionary import unsafe_prompt
     try:
         contact_answers = unsafe_prompt(contact_questions)
         connection_answers = unsafe_prompt(connection_questions)
@@ -287,6 +257,7 @@ def prompt_network_element(element: NetworkElement = None) -> Union[NetworkEleme
 
 
 def confirm_delete(element: NetworkElement) -> bool:
+    from questionary import unsafe_prompt
     questions = [
         {
             'type': 'confirm',
@@ -302,79 +273,22 @@ def confirm_delete(element: NetworkElement) -> bool:
     except KeyboardInterrupt:
         return False
     
-class GoogleContact:
-    def __init__(self, name, surname, phone1, phone2, phone3, email1, email2, email3, birthdate=None, note=None):
-        self.name = name
-        self.surname = surname
-        self.phone1 = phone1
-        self.phone2 = phone2
-        self.phone3 = phone3
-        self.email1 = email1
-        self.email2 = email2
-        self.email3 = email3
-        self.birthdate = birthdate
-        self.note = note
-
-    def __str__(self) -> str:
-        return f'{self.name} {self.surname} {self.email} {self.phone} {self.birthdate} {self.note}'
-
-    def __repr__(self) -> str:
-        return self._str_()
-
-
-google_contact_columns = ["Name", "Given Name", "Additional Name", "Family Name", "Yomi Name", "Given Name Yomi",
-                          "Additional Name Yomi", "Family Name Yomi", "Name Prefix", "Name Suffix", "Initials",
-                          "Nickname", "Short Name", "Maiden Name", "Birthday", "Gender", "Location",
-                          "Billing Information", "Directory Server", "Mileage", "Occupation", "Hobby", "Sensitivity",
-                          "Priority", "Subject", "Notes", "Language", "Photo", "Group Membership", "E-mail 1 - Type",
-                          "E-mail 1 - Value", "E-mail 2 - Type", "E-mail 2 - Value", "IM 1 - Type", "IM 1 - Service",
-                          "IM 1 - Value", "Phone 1 - Type", "Phone 1 - Value", "Phone 2 - Type", "Phone 2 - Value",
-                          "Phone 3 - Type", "Phone 3 - Value", "Phone 4 - Type", "Phone 4 - Value", "Phone 5 - Type",
-                          "Phone 5 - Value", "Address 1 - Type", "Address 1 - Formatted", "Address 1 - Street",
-                          "Address 1 - City", "Address 1 - PO Box", "Address 1 - Region", "Address 1 - Postal Code",
-                          "Address 1 - Country", "Address 1 - Extended Address", "Address 2 - Type",
-                          "Address 2 - Formatted", "Address 2 - Street", "Address 2 - City", "Address 2  - PO Box",
-                          "Address 2 - Region", "Address 2 - Postal Code", "Address 2 - Country",
-                          "Address 2 - Extended Address", "Organization 1 - Type", "Organization 1 - Name",
-                          "Organization 1 - Yomi Name", "Organization 1 - Title", "Organization 1 - Department",
-                          "Organization 1 - Symbol", "Organization 1 - Location", "Organization  1 - Job Description",
-                          "Website 1 - Type", "Website 1 - Value"]
-
-
-def parse_google_contacts(file_path: str) -> List[GoogleContact]:
-    contacts = []
-    with open(file_path, 'r') as file:
-        reader = csv.reader(file)
-        next(reader)  # Skip the header row
-        for row in reader:
-            contact = GoogleContact(
-                name=row[google_contact_columns.index('Name')],
-                surname=row[google_contact_columns.index('Given Name')] + " " + row[
-                    google_contact_columns.index('Additional Name')] + " " + row[
-                            google_contact_columns.index('Family Name')],
-                phone1=row[google_contact_columns.index('Phone 1 - Value')],
-                phone2=row[google_contact_columns.index('Phone 2 - Value')],
-                phone3=row[google_contact_columns.index('Phone 3 - Value')],
-                email1=row[google_contact_columns.index('E-mail 1 - Value')],
-                email2=row[google_contact_columns.index('E-mail 2 - Value')],
-                email3="",
-                birthdate=row[google_contact_columns.index('Birthday')],
-                note=row[google_contact_columns.index('Notes')]
-            )
-            contacts.append(contact)
-    return contacts
-
 main_menu: List[str] = [
     'Find record',
     'Find record without birthdays',
+    'Search everything',
+    'Lookup phone or email',
     'Create record',
     'Edit record',
     'Import Google contacts',
+    'Import contacts from vCard or CSV',
+    'Find duplicates',
     'Delete record',
     'Exit'
 ]
 
 def menu():
+    from questionary import unsafe_prompt
     questions = [
         {
             'type': 'list',
@@ -390,77 +304,227 @@ def menu():
         return "Exit"
 
 
-def print_contacts(contacts):
-    # from tabulate import tabulate
-    #    table: List[List[str]] = []
-    #    for contact in contacts:
-    #        each_row = [contact.id, contact.name, contact.surname, contact.birthdate, contact.note]
-    #        table.append(each_row)
-    #    print(tabulate(table, headers=["ID", "Name", "Surname", "Birthdate", "Note"]))
-
-    table = Table(show_header=True, header_style="bold green")
-    table.add_column("ID")
-    table.add_column("Name")
-    table.add_column("Surname")
-    table.add_column("Birthdate")
-    table.add_column("Note")
-
-    for contact in contacts:
-        table.add_row(str(contact.id), contact.name, contact.surname, str(contact.birthdate), contact.note)
-
-    console = Console()
-    console.print(table)
-
-
-def print_network_element(network_elements: List[NetworkElement]) -> None:
-    table = Table(show_header=True, header_style="bold green")
-    table.add_column("ID")
-    table.add_column("Name")
-    table.add_column("Surname")
-    table.add_column("Birthdate")
-    table.add_column("Note")
-    # table.add_column("Phone privat")
-    # table.add_column("Phone work")
-    # table.add_column("Phone secret")
-    # table.add_column("Email privat")
-    # table.add_column("Email work")
-    # table.add_column("Email secret")
-    # table.add_column("Whatsup")
-    # table.add_column("Telegram")
-    # table.add_column("Signal")
-    # table.add_column("Hangouts")
-
-    for element in network_elements:
-        table.add_row(str(element.contact.id),
-                      element.contact.name,
-                      element.contact.surname,
-                      str(element.contact.birthdate),
-                      element.contact.note,
-                      # element.connection.phone_privat,
-                      # element.connection.phone_work,
-                      # element.connection.phone_secret,
-                      # element.connection.email_privat,
-                      # element.connection.email_work,
-                      # element.connection.email_secret,
-                      # element.connection.whatsup,
-                      # element.connection.telegram,
-                      # element.connection.signal,
-                      # element.connection.hangouts
-                      )
-    console = Console()
-    console.print(table)
+def print_rich(*objects) -> None:
+    """ print with rich markup """
+    from rich import print as rich_print
+    rich_print(*objects)
+
+
+def print_contacts(contacts: Iterable[Contact]) -> int:
+    return print_table(["ID", "Name", "Surname", "Birthdate", "Note"],
+                       ((contact.id, contact.name, contact.surname, contact.birthdate, contact.note) for contact in contacts))
+
+
+def print_network_element(network_elements: Iterable[NetworkElement]) -> int:
+    """ :return: amount of printed elements """
+    return print_table(["ID", "Name", "Surname", "Birthdate", "Note"],
+                       ((element.contact.id,
+                         element.contact.name,
+                         element.contact.surname,
+                         element.contact.birthdate,
+                         element.contact.note) for element in network_elements))
+
+
+def print_search_results(results: Iterable[Tuple[Contact, str, str]]) -> int:
+    return print_table(["ID", "Name", "Surname", "Found in", "Match"],
+                       ((contact.id, contact.name, contact.surname, kind, fragment) for contact, kind, fragment in results))
+
+
+def print_changes(changes: Iterator[Change], since_seq: int) -> int:
+    """ :return: seq of the last printed change, since_seq of the next call """
+    last_seq = since_seq
+
+    def values_of_changes():
+        nonlocal last_seq
+        for change in changes:
+            last_seq = change.seq
+            yield change.values()
+
+    print_table(CHANGE_COLUMNS, values_of_changes())
+    return last_seq
+
+
+def select_kept_contact(connection: Connection, group: DuplicateGroup) -> Union[int, None]:
+    """ :return: id of the contact to keep, 0 - skip the group, None - stop """
+    from questionary import Separator, unsafe_prompt
+    default = choose_kept_contact(connection, group.ids)
+    choices = [{'name': f"Keep {element.contact.id} {element.contact.name} {element.contact.surname}",
+                'value': element.contact.id} for element in get_network_elements(connection, group.ids)]
+    choices += [Separator(), {'name': 'Skip', 'value': 0}, {'name': 'Stop', 'value': -1}]
+    questions = [
+        {
+            'type': 'list',
+            'name': 'kept',
+            'message': 'Merge duplicates into:',
+            'choices': choices,
+            'default': next(choice for choice in choices if isinstance(choice, dict) and choice['value'] == default)
+        }
+    ]
+    try:
+        kept_id = unsafe_prompt(questions)['kept']
+    except KeyboardInterrupt:
+        return None
+    return None if kept_id == -1 else kept_id
+
+
+def resolve_duplicates(connection: Connection, groups: List[DuplicateGroup]) -> None:
+    """ show every group of duplicates and merge it into the selected contact """
+    for number, group in enumerate(groups, 1):
+        print(f"------------- {number}/{len(groups)}, same {', '.join(sorted(group.keys))}")
+        print_table(["ID", "Name", "Surname", "Birthdate", "Phone", "Email"],
+                    ((element.contact.id, element.contact.name, element.contact.surname, element.contact.birthdate,
+                      element.connection.phone_privat if element.connection else "",
+                      element.connection.email_privat if element.connection else "")
+                     for element in get_network_elements(connection, group.ids)))
+        kept_id = select_kept_contact(connection, group)
+        if kept_id is None:
+            break
+        if kept_id:
+            moved = merge_contacts(connection, kept_id, group.ids)
+            print(f"merged into {kept_id}, meetings moved: {moved}")
+
+
+def import_adapter(path_to_file: str) -> ImportAdapter:
+    """ format of the imported file from --type, --mapping ( --date-format, --delimiter ) or from the file """
+    import_type = get_option("--type")
+    if import_type == "csv" or (import_type is None and get_option("--mapping")):
+        if not get_option("--mapping"):
+            raise ValueError("--type=csv requires --mapping=name=<column>,surname=<column>,...")
+        return csv_mapping_adapter(get_option("--mapping"), get_option("--date-format"), get_option("--delimiter"))
+    if import_type is not None:
+        if import_type not in IMPORT_ADAPTERS:
+            raise ValueError(f"unknown --type={import_type}, types: {', '.join(list(IMPORT_ADAPTERS) + ['csv'])}")
+        return IMPORT_ADAPTERS[import_type]
+    return detect_import_adapter(path_to_file)
 
 
 if __name__ == '__main__':
-    if len(sys.argv) > 1:
-        database = sys.argv[1]
+    if len(get_arguments()) > 1:
+        database = get_arguments()[1]
     else:
         database = DB_DEFAULT_PATH
 
-    with create_connection(database) as connection:
+    with open_database(database) as connection:
         init_database(connection)
+        report_startup_profile()
+
+        if "import_google" in sys.argv:
+            # non-interactive import: contacts-manager.py <db> import_google <csv file> [--batch-size=N] [--skip-existing]
+            #                         [--workers=N] ( parsing processes, 0 - all cores ) [--restart]
+            path_to_file = sys.argv[sys.argv.index("import_google") + 1]
+            import_google_contacts(connection, path_to_file, get_int_option("--batch-size", IMPORT_BATCH_SIZE),
+                                   skip_existing="--skip-existing" in sys.argv,
+                                   workers=get_int_option("--workers", 1) or os.cpu_count() or 1,
+                                   restart="--restart" in sys.argv)
+            sys.exit(0)
+
+        if "import" in get_arguments():
+            # contacts-manager.py <db> import <file> [--type=google|outlook|vcard|csv] ( default - by the file )
+            #                     [--mapping=name=First,surname=Middle+Last,phone_privat=Mobile,...] ( --type=csv )
+            #                     [--date-format=%d.%m.%Y] [--delimiter=;] and options of import_google
+            path_to_file = get_arguments()[get_arguments().index("import") + 1]
+            try:
+                adapter = import_adapter(path_to_file)
+            except (ValueError, OSError) as e:
+                print(f"can't import {path_to_file}: {e}", file=sys.stderr)
+                sys.exit(2)
+            import_file(connection, path_to_file, adapter, get_int_option("--batch-size", IMPORT_BATCH_SIZE),
+                        skip_existing="--skip-existing" in sys.argv,
+                        workers=get_int_option("--workers", 1) or os.cpu_count() or 1,
+                        restart="--restart" in sys.argv)
+            sys.exit(0)
+
+        if "export" in get_arguments():
+            # contacts-manager.py <db> export [--format=csv|jsonl|vcard] [--output=file] ( default - stdout )
+            #                     [--since=2026-10-01T22:00:00] ( changed contacts, deleted ones too )
+            #                     [--since-seq=N] ( contacts with changes after seq N of the change log, meetings too )
+            export_format = get_option("--format", "csv")
+            if export_format not in EXPORT_FORMATS:
+                print(f"unknown --format={export_format}, formats: {', '.join(EXPORT_FORMATS)}", file=sys.stderr)
+                sys.exit(2)
+            try:
+                since = parse_since(get_option("--since")) if get_option("--since") else None
+            except ValueError as e:
+                print(f"wrong --since: {e}", file=sys.stderr)
+                sys.exit(2)
+            try:
+                since_seq = int(get_option("--since-seq")) if get_option("--since-seq") else None
+            except ValueError as e:
+                print(f"wrong --since-seq: {e}", file=sys.stderr)
+                sys.exit(2)
+            started = datetime.now().replace(microsecond=0)
+            # changes during the export are exported again next time, none is lost
+            next_seq = last_change_seq(connection)
+            output = get_option("--output")
+            try:
+                if output:
+                    with open(output, "w", encoding="utf-8", newline="") as file:
+                        exported = export_network(connection, file, export_format, since, since_seq)
+                else:
+                    exported = export_network(connection, sys.stdout, export_format, since, since_seq)
+                    sys.stdout.flush()
+            except ChangesPruned as e:
+                print(e, file=sys.stderr)
+                sys.exit(3)
+            except BrokenPipeError:
+                # reader is closed ( head ): stop quietly
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+                sys.exit(1)
+            print(f"exported: {exported} contacts, next incremental export: --since={started.isoformat()} "
+                  f"or --since-seq={next_seq}", file=sys.stderr)
+            sys.exit(0)
+
+        if "changes" in get_arguments():
+            # contacts-manager.py <db> changes [--since-seq=N] ( seq of the last read change ) [--limit=N]
+            #                     [--format=table|tsv|jsonl] [--prune=N] ( delete changes up to seq N )
+            if get_option("--prune"):
+                try:
+                    up_to_seq = int(get_option("--prune"))
+                except ValueError as e:
+                    print(f"wrong --prune: {e}", file=sys.stderr)
+                    sys.exit(2)
+                print(f"pruned: {prune_changes(connection, up_to_seq)} changes", file=sys.stderr)
+                sys.exit(0)
+            try:
+                since_seq = get_int_option("--since-seq", 0)
+            except ValueError as e:
+                print(f"wrong --since-seq: {e}", file=sys.stderr)
+                sys.exit(2)
+            try:
+                changes = iter_changes(connection, since_seq, get_int_option("--limit", 0) or None)
+            except ChangesPruned as e:
+                print(e, file=sys.stderr)
+                sys.exit(3)
+            print(f"next: --since-seq={print_changes(changes, since_seq)}", file=sys.stderr)
+            sys.exit(0)
+
+        if "dedup" in get_arguments():
+            # contacts-manager.py <db> dedup [--auto] [--keys=phone,email,name]
+            if "--auto" in sys.argv:
+                groups = find_duplicates(connection, get_option("--keys", ",".join(DEDUP_STRONG_KEYS)).split(","))
+                merged, deleted = merge_duplicates(connection, groups)
+                print(f"duplicates: {len(groups)} groups, merged: {merged}, deleted contacts: {deleted}")
+            else:
+                resolve_duplicates(connection, find_duplicates(connection, get_option("--keys", ",".join(DEDUP_KEYS)).split(",")))
+            sys.exit(0)
+
+        if "list" in get_arguments():
+            # contacts-manager.py <db> list [name] [surname] [--format=table|tsv|jsonl] - streamed, for grep/less
+            arguments = get_arguments()[get_arguments().index("list") + 1:]
+            print_network_element(iter_network_elements(
+                connection, (contact.id for contact in iter_contacts_by_name_and_surname(connection, *arguments[:2]))))
+            sys.exit(0)
+
+        if "lookup" in sys.argv:
+            # contacts-manager.py <db> lookup <phone or email>
+            identifier = sys.argv[sys.argv.index("lookup") + 1]
+            elements = get_network_elements(connection, lookup_contact_ids(connection, identifier))
+            for element in elements:
+                print(f"{element.contact.id}\t{element.contact.name}\t{element.contact.surname}")
+            sys.exit(0 if elements else 1)
 
         while True:
+            checkpoint_working_copy()
             mode: str = menu()
             if mode == 'Exit':
                 sys.exit(0)
@@ -512,20 +576,39 @@ if __name__ == '__main__':
                     surname = input("Enter the surname of the contact you want to find: ")
                 except KeyboardInterrupt:
                     continue
-                contacts = get_contacts_by_name_and_surname(connection, name, surname)
-                if not contacts:
+                contacts = iter_contacts_by_name_and_surname(connection, name, surname)
+                if not print_network_element(iter_network_elements(connection, (contact.id for contact in contacts))):
                     print_rich(f"[bold yellow]Warning: [/bold yellow] element ({name} {surname}) was not found.")
-                else:
-                    # print_contacts(contacts)
-                    print_network_element([get_network_element(connection, contact.id) for contact in contacts])
 
             if mode == 'Find record without birthdays':
                 print("-------------")
-                contacts = get_contacts_without_birthdays(connection)
-                if not contacts:
+                contacts = iter_contacts_without_birthdays(connection)
+                if not print_network_element(iter_network_elements(connection, (contact.id for contact in contacts))):
                     print_rich("[bold green]Success: [/bold green] All contacts have birthdays.")
+
+            if mode == 'Search everything':
+                print("-------------")
+                try:
+                    text = input("Enter words ( or beginnings of the words ) to find: ")
+                except KeyboardInterrupt:
+                    continue
+                results = search_everything(connection, text)
+                if not results:
+                    print_rich(f"[bold yellow]Warning: [/bold yellow] nothing was found for ({text}).")
+                else:
+                    print_search_results(results)
+
+            if mode == 'Lookup phone or email':
+                print("-------------")
+                try:
+                    identifier = input("Enter phone number or email: ")
+                except KeyboardInterrupt:
+                    continue
+                elements = get_network_elements(connection, lookup_contact_ids(connection, identifier))
+                if not elements:
+                    print_rich(f"[bold yellow]Warning: [/bold yellow] element ({identifier}) was not found.")
                 else:
-                    print_network_element([get_network_element(connection, contact.id) for contact in contacts])
+                    print_network_element(elements)
 
             if mode == 'Import Google contacts':
                 print("-------------")
@@ -533,9 +616,27 @@ if __name__ == '__main__':
                     path_to_file = input("Enter full path to csv file with Google contacts: ")
                 except KeyboardInterrupt:
                     continue
-                contacts: List[GoogleContact] = parse_google_contacts(path_to_file)
-                for contact in contacts:
-                    element = NetworkElement(Contact(0, contact.name, contact.surname, contact.birthdate, contact.note),
-                                             Connection(0, 0, contact.phone1, contact.phone2, contact.phone3,
-                                                        contact.email1, contact.email2, contact.email3, '', '', '', ''))
-                    create_network_element(connection, element)
+                import_google_contacts(connection, path_to_file, get_int_option("--batch-size", IMPORT_BATCH_SIZE),
+                                       skip_existing="--skip-existing" in sys.argv, restart="--restart" in sys.argv)
+
+            if mode == 'Import contacts from vCard or CSV':
+                print("-------------")
+                try:
+                    path_to_file = input("Enter full path to vCard ( .vcf ), Outlook or Google csv file: ")
+                except KeyboardInterrupt:
+                    continue
+                try:
+                    adapter = import_adapter(path_to_file)
+                except (ValueError, OSError) as e:
+                    print_rich(f"[bold red]Error: [/bold red] {e}")
+                    continue
+                import_file(connection, path_to_file, adapter, get_int_option("--batch-size", IMPORT_BATCH_SIZE),
+                            skip_existing="--skip-existing" in sys.argv, restart="--restart" in sys.argv)
+
+            if mode == 'Find duplicates':
+                print("-------------")
+                groups = find_duplicates(connection)
+                if not groups:
+                    print_rich("[bold green]Success: [/bold green] no duplicates found.")
+                else:
+                    resolve_duplicates(connection, groups)
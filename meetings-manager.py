@@ -1,23 +1,22 @@
 import sys
 import threading
 from datetime import datetime, timedelta
-import sqlite3
 from sqlite3 import Connection
-from typing import List, Union, Tuple
+from typing import Callable, Iterable, List, Union, Tuple
 
-from pynput import keyboard
-from pynput.keyboard import Key, Controller
-from questionary import prompt, Separator, unsafe_prompt, Style, press_any_key_to_continue
-from rich.console import Console
-from rich.table import Table
 
 
-def adapt_datetime(dt):
-    return dt.strftime('%Y-%m-%d %H:%M:%S')
-sqlite3.register_adapter(datetime, adapt_datetime)
 
-from _common import create_table, create_connection, DB_DEFAULT_PATH, Meeting, get_contacts_by_name_and_surname, \
-    Contact, Status
+from _common import create_table, DB_DEFAULT_PATH, Meeting, \
+    Contact, Status, migrate_database, SQL_CREATE_MEETINGS, search_everything, get_arguments, \
+    open_database, checkpoint_working_copy, report_startup_profile, Pages, PAGE_SIZE, keyset_page, list_pages, \
+    contact_pages, get_int_option, get_cached_network_element, IDENTITY_CACHE, get_columns, is_migrated, \
+    migration_meetings_epoch
+from _output import print_table
+
+NEXT_PAGE = 'Next page >>'
+PREVIOUS_PAGE = '<< Previous page'
+JUMP_TO_NAME = 'Jump to name ...'
 
 
 def db_create_meeting(connection: Connection, meeting: Meeting) -> Meeting:
@@ -32,6 +31,7 @@ def db_create_meeting(connection: Connection, meeting: Meeting) -> Meeting:
         meeting.id = cursor.lastrowid
     finally:
         cursor.close()
+        IDENTITY_CACHE.invalidate("meetings", meeting.id_contact)
     return meeting
 
 
@@ -46,34 +46,26 @@ def db_update_meeting(connection: Connection, meeting: Meeting) -> None:
         connection.commit()
     finally:
         cursor.close()
+        IDENTITY_CACHE.invalidate("meetings", meeting.id_contact)
 
 
 def db_init_database(connection: Connection) -> bool:
     """ create tables if not exists """
     if connection is None:
         return False
-    create_table(connection,
-                 """
-                 CREATE TABLE IF NOT EXISTS 
-                 meetings (
-                     id INTEGER PRIMARY KEY, 
-                     id_contact INTEGER, 
-                     date DATE, 
-                     status INTEGER, 
-                     notes TEXT,
-                     FOREIGN KEY (id_contact) REFERENCES contacts (id)
-                     )
-                """)
-    return True
+    create_table(connection, SQL_CREATE_MEETINGS)
+    return migrate_database(connection)
 
 
 def main_menu():
+    from questionary import Separator, unsafe_prompt
     questions = [
         {
             'type': 'list',
             'name': 'main_menu',
             'message': 'Main Menu:',
-            'choices': ['Upcoming Meetings ( till tomorrow )', 'Find person', 'Find All persons without meetings', Separator(), 'Exit']
+            'choices': ['Upcoming Meetings ( till tomorrow )', 'Find person', 'Search everything', 'Find All persons without meetings',
+                        'Find All persons without meetings ( the longest without meeting first )', Separator(), 'Exit']
         }
     ]
     try:
@@ -83,6 +75,7 @@ def main_menu():
 
 
 def person_menu(person_name: str) -> str:
+    from questionary import Separator, unsafe_prompt, Style
     questions = [
         {
             'type': 'list',
@@ -102,6 +95,7 @@ def person_menu(person_name: str) -> str:
 
 
 def edit_meeting_menu():
+    from questionary import prompt, Separator
     questions = [
         {
             'type': 'list',
@@ -114,24 +108,69 @@ def edit_meeting_menu():
     return prompt(questions)['edit_meeting_menu']
 
 
-def select_one_contact(contacts: List[Contact]) -> Union[Contact, None]:
-    choices = [{'name': f'{contact.name} {contact.surname}', 'value': contact.id} for contact in contacts]
-    choices.insert(0, 'Go back')
-    choices.insert(1, Separator())
-
-    questions = [
-        {
-            'type': 'list',
-            'name': 'contact_menu',
-            'message': 'Select a contact:',
-            'choices': choices
-        }
-    ]
-    try:
-        contact_id: int = unsafe_prompt(questions)['contact_menu']
-        return Contact.get_by_id(contacts, contact_id)
-    except KeyboardInterrupt:
+def select_from_pages(message: str, pages: Pages, describe: Callable[[object], str],
+                      jump: Callable[[str], Tuple] = None) -> Union[object, None]:
+    """
+    select one item, only the visible page ( --page-size ) is fetched and rendered
+    :param pages: see Pages
+    :param describe: text of the item in the list
+    :param jump: key to start the page with the items beginning with entered text, None - no jump
+    :return: selected item or None ( also for empty list )
+    """
+    from questionary import Separator, unsafe_prompt
+    page_size = get_int_option("--page-size", PAGE_SIZE)
+    rows = pages(None, True, page_size + 1)
+    has_previous, has_next = False, len(rows) > page_size
+    rows = rows[:page_size]
+    if not rows:
         return None
+    while True:
+        choices = ['Go back', Separator()]
+        choices += [{'name': describe(item), 'value': position} for position, (_, item) in enumerate(rows)]
+        navigation = ([PREVIOUS_PAGE] if has_previous else []) + ([NEXT_PAGE] if has_next else []) + \
+                     ([JUMP_TO_NAME] if jump else [])
+        if navigation:
+            choices += [Separator()] + navigation
+        try:
+            choice = unsafe_prompt([{'type': 'list', 'name': 'page', 'message': message, 'choices': choices}])['page']
+            if choice == JUMP_TO_NAME:
+                text = unsafe_prompt([{'type': 'input', 'name': 'text', 'message': 'Enter beginning of the name:'}])['text']
+        except KeyboardInterrupt:
+            return None
+
+        if choice == 'Go back':
+            return None
+        elif choice == NEXT_PAGE:
+            next_rows = pages(rows[-1][0], True, page_size + 1)
+            has_previous, has_next = True, len(next_rows) > page_size
+            rows = next_rows[:page_size]
+        elif choice == PREVIOUS_PAGE:
+            previous_rows = pages(rows[0][0], False, page_size + 1)
+            has_previous, has_next = len(previous_rows) > page_size, True
+            rows = previous_rows[-page_size:]
+        elif choice == JUMP_TO_NAME:
+            next_rows = pages(jump(text), True, page_size + 1)
+            if next_rows:
+                has_next = len(next_rows) > page_size
+                rows = next_rows[:page_size]
+                has_previous = len(pages(rows[0][0], False, 1)) > 0
+        else:
+            return rows[choice][1]
+
+
+def jump_to_name(text: str) -> Tuple:
+    """ key of CONTACT_NAME_KEY right before the names beginning with the text """
+    text = text.strip()
+    return text[:1].upper() + text[1:], "", 0
+
+
+def select_one_contact(pages: Pages, by_name: bool = True) -> Union[Contact, None]:
+    """
+    :param pages: contacts, see contact_pages
+    :param by_name: contacts are in alphabetical order ( CONTACT_NAME_KEY ), jump to name is possible
+    """
+    return select_from_pages('Select a contact:', pages, lambda contact: f'{contact.name} {contact.surname}',
+                             jump_to_name if by_name else None)
 
 
 def find_contact_menu(contacts) -> int:
@@ -139,6 +178,7 @@ def find_contact_menu(contacts) -> int:
     :param contacts:
     :return: contact id
     """
+    from questionary import unsafe_prompt
     questions = [
         {
             'type': 'input',
@@ -156,11 +196,39 @@ def find_contact_menu(contacts) -> int:
     except KeyboardInterrupt:
         return None
 
-    name = answers['name']
-    surname = answers['surname']
-    contacts: List[Contact] = get_contacts_by_name_and_surname(connection, name, surname)
+    condition, params = "", []
+    if answers['name']:
+        condition += " AND c.name LIKE ?"
+        params.append('%' + answers['name'] + '%')
+    if answers['surname']:
+        condition += " AND c.surname LIKE ?"
+        params.append('%' + answers['surname'] + '%')
+    return select_one_contact(contact_pages(connection, condition, params))
+
 
-    return select_one_contact(contacts)
+def search_contact_menu(connection: Connection) -> Union[Contact, None]:
+    """ full-text search over contacts, connections and meeting notes, select one of the found contacts """
+    from questionary import unsafe_prompt
+    questions = [
+        {
+            'type': 'input',
+            'name': 'text',
+            'message': 'Enter words ( or beginnings of the words ) to find:',
+        }
+    ]
+    try:
+        answers = unsafe_prompt(questions)
+    except KeyboardInterrupt:
+        return None
+
+    contacts: List[Contact] = []
+    found_ids = set()
+    for contact, _, _ in search_everything(connection, answers['text']):
+        if contact.id not in found_ids:
+            found_ids.add(contact.id)
+            contacts.append(contact)
+    # ranked by relevance, not more than one page of search_everything
+    return select_one_contact(list_pages(contacts), by_name=False)
 
 
 def check_date_format(date: str) -> bool:
@@ -173,6 +241,7 @@ def check_date_format(date: str) -> bool:
 
 
 def meeting_menu(meeting: Meeting) -> Meeting:
+    from questionary import unsafe_prompt
     questions = [
         {
             'type': 'list',
@@ -221,14 +290,29 @@ def save_meeting(connection: Connection, new_meeting: Meeting) -> Meeting:
         return db_create_meeting(connection, new_meeting)
 
 
-def get_todo_meeting_by_contact_id(connection: Connection, contact_id: int):
+def get_todo_meeting_by_contact_id(connection: Connection, contact_id: int) -> List[Meeting]:
+    """ open meetings of the contact, next one first; usual case ( none or one open meeting ) is answered by meeting_summary """
+    return IDENTITY_CACHE.get(connection, ("meetings", contact_id, "open"),
+                              lambda: read_todo_meetings(connection, contact_id))
+
+
+def read_todo_meetings(connection: Connection, contact_id: int) -> List[Meeting]:
     cursor = connection.cursor()
     try:
         cursor.execute(
-            "SELECT id_contact, date, status, notes, id FROM meetings WHERE id_contact=? AND status in (?, ?)  order by DATE ASC",
+            """SELECT s.open_count, m.id_contact, m.date AS "date [epoch]", m.status, m.notes, m.id
+               FROM meeting_summary s inner join meetings m on m.id = s.next_open_id WHERE s.id_contact=?""",
+            (contact_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return []
+        if row[0] == 1:
+            return [Meeting(id_contact=row[1], date=row[2], status=Status(row[3]), notes=row[4], id=row[5])]
+        cursor.execute(
+            'SELECT id_contact, date AS "date [epoch]", status, notes, id FROM meetings WHERE id_contact=? AND status in (?, ?)  order by DATE ASC',
             (contact_id, Status.TODO.value, Status.ASKED.value))
         return [Meeting(id_contact=row[0],
-                        date=datetime.strptime(row[1], '%Y-%m-%d %H:%M:%S'),
+                        date=row[1],
                         status=Status(row[2]),
                         notes=row[3],
                         id=row[4]
@@ -237,14 +321,20 @@ def get_todo_meeting_by_contact_id(connection: Connection, contact_id: int):
         cursor.close()
 
 
-def get_meetings_by_contact_id(connection: Connection, contact_id: int, size: int):
+def get_meetings_by_contact_id(connection: Connection, contact_id: int, size: int) -> List[Meeting]:
+    """ first meetings of the contact by date, cached until the next write of the meetings of the contact """
+    return IDENTITY_CACHE.get(connection, ("meetings", contact_id, size),
+                              lambda: read_meetings(connection, contact_id, size))
+
+
+def read_meetings(connection: Connection, contact_id: int, size: int) -> List[Meeting]:
     cursor = connection.cursor()
     try:
         cursor.execute(
-            "SELECT id_contact, date, status, notes, id FROM meetings WHERE id_contact=? order by DATE ASC  LIMIT ?",
+            'SELECT id_contact, date AS "date [epoch]", status, notes, id FROM meetings WHERE id_contact=? order by DATE ASC  LIMIT ?',
             (contact_id, size))
         return [Meeting(id_contact=row[0],
-                        date=datetime.strptime(row[1], '%Y-%m-%d %H:%M:%S'),
+                        date=row[1],
                         status=Status(row[2]),
                         notes=row[3],
                         id=row[4]
@@ -253,150 +343,143 @@ def get_meetings_by_contact_id(connection: Connection, contact_id: int, size: in
         cursor.close()
 
 
-def select_one_meeting(meetings: List[Meeting]) -> Union[int, None]:
-    if not meetings:
-        return None
-    questions = [
-        {
-            'type': 'list',
-            'name': 'meeting',
-            'message': 'Select a meeting for editing:',
-            'choices': [{"name": f'{meeting.date} - {meeting.notes}', "value": meeting.id} for meeting in meetings]
-        }
-    ]
-    try:
-        meeting_id: int = unsafe_prompt(questions)['meeting']
-    except KeyboardInterrupt:
-        return None
-    if meeting_id:
-        return Meeting.get_by_id(meetings, meeting_id)
-    else:
-        return None
+def select_one_meeting(meetings: List[Meeting]) -> Union[Meeting, None]:
+    return select_from_pages('Select a meeting for editing:', list_pages(meetings),
+                             lambda meeting: f'{meeting.date} - {meeting.notes}')
 
 
-def print_list_of_meetings(meetings: List[Meeting]) -> None:
-    table = Table(show_header=True, header_style="bold green")
-    table.add_column("Date")
-    table.add_column("Status")
-    table.add_column("Notes")
-    for meeting in meetings:
-        table.add_row(meeting.date.strftime('%Y-%m-%d'),
-                      Status(meeting.status.value).name,
-                      meeting.notes)
-    console = Console()
-    console.print(table)
+def print_list_of_meetings(meetings: Iterable[Meeting]) -> int:
+    return print_table(["Date", "Status", "Notes"],
+                       ((meeting.date.strftime('%Y-%m-%d'), Status(meeting.status.value).name, meeting.notes)
+                        for meeting in meetings))
 
 
-def find_upcoming_meetings(connection: Connection, control_date: datetime) -> List[Tuple[Meeting, Contact]]:
+def has_meeting_summary(connection: Connection) -> bool:
+    """ False for read-only connection ( print_only ) to not migrated database """
     cursor = connection.cursor()
     try:
-        cursor.execute(
-            """ 
-            SELECT m.id_contact, m.date, m.status, m.notes, m.id,
-                   c.id, c.name, c.surname, c.birthdate, c.note 
-            FROM meetings m inner join contacts c on m.id_contact = c.id  
-            WHERE m.status<? and m.date < ? order by m.DATE ASC
-            """,
-            (Status.DONE.value, control_date,))
-        result = [(Meeting(id_contact=row[0],
-                           date=datetime.strptime(row[1], '%Y-%m-%d %H:%M:%S'),
-                           status=Status(row[2]),
-                           notes=row[3],
-                           id=row[4]
-                           ),
-                   Contact(
-                       id=row[5],
-                       name=row[6],
-                       surname=row[7],
-                       birthdate=row[8],
-                       note=row[9]
-                   )) for row in cursor.fetchall()]
-        if not result or len(result) == 0:
-            return None
-        else:
-            return result
+        return bool(get_columns(cursor, "meeting_summary"))
     finally:
         cursor.close()
 
 
+def upcoming_meetings_pages(connection: Connection, control_date: datetime) -> Pages:
+    """ pages of ( meeting, contact ): next open meeting of every contact before control_date, idx_meeting_summary_next_open_date """
+    sql = """ 
+          SELECT m.id_contact, m.date AS "date [epoch]", m.status, m.notes, m.id,
+                 c.id, c.name, c.surname, c.birthdate, c.note, s.next_open_date, s.id_contact
+          FROM meeting_summary s
+               inner join meetings m on m.id = s.next_open_id
+               inner join contacts c on s.id_contact = c.id  
+          WHERE s.next_open_date < ?
+          """
+    key_columns = ["s.next_open_date", "s.id_contact"]
+    params = (control_date,)
+    if not has_meeting_summary(connection):
+        # read-only connection to not migrated database: every open meeting, idx_meetings_open_date
+        sql = """ 
+              SELECT m.id_contact, m.date AS "date [epoch]", m.status, m.notes, m.id,
+                     c.id, c.name, c.surname, c.birthdate, c.note, m.date, m.id
+              FROM meetings m inner join contacts c on m.id_contact = c.id  
+              WHERE m.status < 20 and m.date < ?
+              """
+        key_columns = ["m.date", "m.id"]
+        cursor = connection.cursor()
+        try:
+            if not is_migrated(cursor, migration_meetings_epoch):
+                # dates as text '%Y-%m-%d %H:%M:%S'
+                params = (control_date.strftime('%Y-%m-%d %H:%M:%S'),)
+        finally:
+            cursor.close()
+
+    def pages(key: Union[Tuple, None], forward: bool, limit: Union[int, None]) -> List[Tuple[Tuple, Tuple[Meeting, Contact]]]:
+        return [(row[10:],
+                 (Meeting(id_contact=row[0],
+                          date=row[1],
+                          status=Status(row[2]),
+                          notes=row[3],
+                          id=row[4]
+                          ),
+                  Contact(
+                      id=row[5],
+                      name=row[6],
+                      surname=row[7],
+                      birthdate=row[8],
+                      note=row[9]
+                  ))) for row in keyset_page(connection, sql, params, key_columns, key, forward, limit)]
+    return pages
+
+
+def find_upcoming_meetings(connection: Connection, control_date: datetime) -> List[Tuple[Meeting, Contact]]:
+    result = [element for _, element in upcoming_meetings_pages(connection, control_date)(None, True, None)]
+    if not result or len(result) == 0:
+        return None
+    else:
+        return result
+
+
 def print_contact(connection: Connection, id_contact: int) -> None:
-    cursor = connection.cursor()
-    try:
-        cursor.execute("""SELECT contacts.name, contacts.surname, contacts.birthdate, contacts.note,
-                                connections.phone_privat, connections.phone_work, connections.phone_secret, 
-                                connections.email_privat, connections.email_work, connections.email_secret, 
-                                connections.whatsup, connections.telegram, connections.signal, connections.hangouts 
-                               FROM contacts inner join connections on contacts.id = connections.id_contact WHERE contacts.id=? """,
-                       (id_contact,))
-        row = cursor.fetchone()
+    from rich.console import Console
+    from rich.table import Table
+    element = get_cached_network_element(connection, id_contact)
+    if element is None:
+        return
+    contact = element.contact
 
-        console = Console()
-
-        table = Table(show_header=True, header_style="bold green")
-        table.add_column("Name")
-        table.add_column("Surname")
-        table.add_column("Birthday")
-        table.add_column("Note")
-        table.add_row(row[0], row[1], row[2], row[3])
-        console.print(table)
-
-        table = Table(show_header=True, header_style="bold green")
-        table.add_column("Phone")
-        table.add_column("EMail")
-        table.add_column("IM")
-        table.add_row(row[4], row[7], "w:" + row[10])
-        table.add_row(row[5], row[8], "t:" + row[11])
-        table.add_row(row[6], row[9], "s:" + row[12])
-        table.add_row("", "", "h:" + row[13])
-        console.print(table)
+    console = Console()
 
-    finally:
-        cursor.close()
+    table = Table(show_header=True, header_style="bold green")
+    table.add_column("Name")
+    table.add_column("Surname")
+    table.add_column("Birthday")
+    table.add_column("Note")
+    table.add_row(contact.name, contact.surname, contact.birthdate, contact.note)
+    console.print(table)
+
+    connection_of_contact = element.connection
+    if connection_of_contact is None:
+        return
+    table = Table(show_header=True, header_style="bold green")
+    table.add_column("Phone")
+    table.add_column("EMail")
+    table.add_column("IM")
+    table.add_row(connection_of_contact.phone_privat, connection_of_contact.email_privat, "w:" + (connection_of_contact.whatsup or ""))
+    table.add_row(connection_of_contact.phone_work, connection_of_contact.email_work, "t:" + (connection_of_contact.telegram or ""))
+    table.add_row(connection_of_contact.phone_secret, connection_of_contact.email_secret, "s:" + (connection_of_contact.signal or ""))
+    table.add_row("", "", "h:" + (connection_of_contact.hangouts or ""))
+    console.print(table)
 
 
-def select_one_meeting_with_contacts(meetings: List[Tuple[Meeting, Contact]]) -> Union[Meeting, None]:
-    if not meetings:
-        return None
-    questions = [
-        {
-            'type': 'list',
-            'name': 'meeting',
-            'message': 'Select a meeting for editing:',
-            'choices': [{"name": f"{str(meeting.date)[:10]:<10} - {meeting.status.name[:10]:>10} - {contact.name} {contact.surname}", "value": meeting.id} for meeting, contact in meetings]
-        }
-    ]
-    try:
-        meeting_id: int = unsafe_prompt(questions)['meeting']
-    except KeyboardInterrupt:
-        return None
-    if meeting_id:
-        return Meeting.get_by_id([meeting for meeting, _ in meetings], meeting_id)
-    else:
-        return None
+def select_one_meeting_with_contacts(pages: Pages) -> Union[Meeting, None]:
+    """ :param pages: ( meeting, contact ), see upcoming_meetings_pages """
+    selected = select_from_pages(
+        'Select a meeting for editing:', pages,
+        lambda element: f"{str(element[0].date)[:10]:<10} - {element[0].status.name[:10]:>10} - {element[1].name} {element[1].surname}")
+    return selected[0] if selected else None
 
 
-def find_contacts_without_meetings(connection: Connection) -> List[Contact]:
-    cursor = connection.cursor()
-    try:
-        cursor.execute(
-            """ 
-            SELECT c.id, c.name, c.surname, c.birthdate, c.note
-            FROM contacts c            
-            WHERE c.id not in (SELECT id_contact FROM meetings where id_contact is not null and date >= ?) and c.deleted = 0
-            """,
-            (datetime.now(),))
-        return [Contact(id=row[0],
-                        name=row[1],
-                        surname=row[2],
-                        birthdate=row[3],
-                        note=row[4]
-                        ) for row in cursor.fetchall()]
-    finally:
-        cursor.close()
+def contacts_without_meetings_pages(connection: Connection, order_by_last_meeting: bool = False) -> Pages:
+    """
+    pages of contacts without open ( TODO, ASKED ) meetings, one primary key probe of meeting_summary per contact
+    :param order_by_last_meeting: never met contacts first, then contacts with the oldest last DONE meeting,
+                                  alphabetical order otherwise
+    """
+    if not has_meeting_summary(connection):
+        # read-only connection to not migrated database: probes of idx_meetings_id_contact_date
+        return contact_pages(connection, "AND NOT EXISTS (SELECT 1 FROM meetings m WHERE m.id_contact = c.id AND m.status < 20)",
+                             key_columns=["coalesce((SELECT max(m.date) FROM meetings m WHERE m.id_contact = c.id AND m.status = 20), 0)",
+                                          "c.id"] if order_by_last_meeting else None)
+    return contact_pages(connection, "AND s.next_open_id IS NULL", join="left join meeting_summary s on s.id_contact = c.id",
+                         key_columns=["coalesce(s.last_done_date, 0)", "c.id"] if order_by_last_meeting else None)
+
+
+def find_contacts_without_meetings(connection: Connection, order_by_last_meeting: bool = False) -> List[Contact]:
+    return [contact for _, contact in contacts_without_meetings_pages(connection, order_by_last_meeting)(None, True, None)]
 
 
 def confirm_new_meeting_creation(meeting: Meeting) -> bool:
     """ ask for new meeting creation, after closing previous one """
+    from questionary import unsafe_prompt
     if meeting.status.value >= Status.DONE.value:
         questions = [
             {
@@ -417,16 +500,16 @@ def confirm_new_meeting_creation(meeting: Meeting) -> bool:
 
 
 def show_menu(connection: Connection):
+    from questionary import press_any_key_to_continue
     while True:
+        checkpoint_working_copy()
         ##########################################################
         choice = main_menu()
         if choice == 'Exit':
             break
         elif choice == 'Upcoming Meetings ( till tomorrow )':
             # datetime.now() + timedelta(days=5)
-            meetings: List[(Meeting, Contact)] = find_upcoming_meetings(connection, datetime.now()) #  + timedelta(days=2))
-            if meetings is None:
-                continue
+            meetings: Pages = upcoming_meetings_pages(connection, datetime.now()) #  + timedelta(days=2))
             selected_meeting = select_one_meeting_with_contacts(meetings)
             if selected_meeting:
                 print_contact(connection, selected_meeting.id_contact)
@@ -441,19 +524,20 @@ def show_menu(connection: Connection):
                     continue
             else:
                 continue
-        elif choice == 'Find All persons without meetings':
-            contacts: List[Contact] = find_contacts_without_meetings(connection)
-            if not contacts:
-                print(f"contacts: {contacts}")
-                continue
-            contact: Contact = select_one_contact(contacts)
+        elif choice.startswith('Find All persons without meetings'):
+            order_by_last_meeting = choice != 'Find All persons without meetings'
+            contact: Contact = select_one_contact(contacts_without_meetings_pages(connection, order_by_last_meeting),
+                                                  by_name=not order_by_last_meeting)
             if contact:
                 print_contact(connection, contact.id)
                 create_new_meeting(connection, contact.id)
             else:
                 continue
-        elif choice == 'Find person':
-            contact: Contact = find_contact_menu(connection)
+        elif choice == 'Find person' or choice == 'Search everything':
+            if choice == 'Find person':
+                contact: Contact = find_contact_menu(connection)
+            else:
+                contact: Contact = search_contact_menu(connection)
             if contact is None:
                 continue
             print_contact(connection, contact.id)
@@ -497,6 +581,9 @@ def create_new_meeting(connection:Connection, contact_id: int):
 
 
 def escape_listener():
+    from pynput import keyboard
+    from pynput.keyboard import Key, Controller
+
     def on_press(key):
         if key == Key.esc:
             # print('Escape key pressed. Exiting...')
@@ -514,8 +601,8 @@ def escape_listener():
 
 if __name__ == '__main__':
     print_only:bool = False
-    if len(sys.argv) > 1:
-        database = sys.argv[1]
+    if len(get_arguments()) > 1:
+        database = get_arguments()[1]
         # check input parameters 
         for each_parameter in sys.argv[1:]:
             if each_parameter.lower() == "print_only":
@@ -528,9 +615,11 @@ if __name__ == '__main__':
         escape_to_break_converter.daemon = True
         escape_to_break_converter.start()
 
-    with create_connection(database) as connection:
-        if not db_init_database(connection):
+    # print_only: read-only connection without DDL, does not block and is not blocked by interactive session
+    with open_database(database, read_only=print_only) as connection:
+        if connection is None or (not print_only and not db_init_database(connection)):
             exit(1)
+        report_startup_profile()
         if print_only:
             elements: List[Tuple[Meeting, Contact]] = find_upcoming_meetings(connection, datetime.now()) #  + timedelta(days=2))
             if elements is not None:
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from _common import migrate_database
+from _importer import csv_mapping_adapter, import_file
+
+MAPPING = "name=First,surname=Last,note=Note"
+
+
+class CsvImportTest(unittest.TestCase):
+    """ import_file of csv files with quoted multi-line values and stray quotes """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.connection = sqlite3.connect(os.path.join(self.directory.name, "test.db"))
+        self.assertTrue(migrate_database(self.connection))
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def import_csv(self, text: str) -> int:
+        path = os.path.join(self.directory.name, "contacts.csv")
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            file.write(text)
+        return import_file(self.connection, path, csv_mapping_adapter(MAPPING), verbose=False)
+
+    def rejects(self) -> list:
+        return self.connection.execute("SELECT record, error FROM import_rejects ORDER BY byte_offset").fetchall()
+
+    def finished(self) -> bool:
+        return self.connection.execute("SELECT finished FROM imports").fetchone()[0] is not None
+
+    def test_multi_line_value_with_delimiters(self):
+        imported = self.import_csv('First,Last,Note\n'
+                                   'Anna,Alt,"met at conf, berlin, 2024\nsecond line"\n'
+                                   'Bert,Berg,\n')
+        self.assertEqual(2, imported)
+        self.assertEqual([], self.rejects())
+        self.assertEqual("met at conf, berlin, 2024\nsecond line",
+                         self.connection.execute("SELECT note FROM contacts WHERE name = 'Anna'").fetchone()[0])
+        self.assertTrue(self.finished())
+
+    def test_stray_quote_rejects_one_line(self):
+        rows = [f"Name{index},Surname{index},note {index}\n" for index in range(3000)]
+        rows[10] = 'Name10,"Surname10,note 10\n'
+        imported = self.import_csv("First,Last,Note\n" + "".join(rows))
+        self.assertEqual(2999, imported)
+        self.assertEqual(['Name10,"Surname10,note 10\n'], [record for record, _ in self.rejects()])
+        self.assertTrue(self.finished())
+
+    def test_split_record_is_not_finished(self):
+        imported = self.import_csv('First,Last,Note\n'
+                                   'Anna,Alt,"first line\nsecond line",extra\n'
+                                   'Bert,Berg,\n')
+        self.assertEqual(1, imported)
+        self.assertEqual(2, len(self.rejects()))
+        self.assertFalse(self.finished())
+
+
+if __name__ == '__main__':
+    unittest.main()